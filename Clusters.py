@@ -0,0 +1,30 @@
+from Lazy_Imports import lazy_import
+
+np = lazy_import('numpy')
+
+
+def connected_labels(pairs, total_rows):
+    """Eticheta de cluster a fiecărui rând (componente conexe), calculată vectorizat.
+
+    Fiecare rând pointează spre cel mai mic rând din componenta sa; legăm rădăcinile
+    și comprimăm drumurile până când toate perechile au aceeași etichetă.
+    """
+    labels = np.arange(total_rows)
+    if len(pairs) == 0:
+        return labels
+    first, second = pairs[:, 0], pairs[:, 1]
+    while True:
+        root_first, root_second = labels[first], labels[second]
+        differ = root_first != root_second
+        if not differ.any():
+            return labels
+        np.minimum.at(
+            labels,
+            np.maximum(root_first[differ], root_second[differ]),
+            np.minimum(root_first[differ], root_second[differ])
+        )
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
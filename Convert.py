@@ -1,18 +1,167 @@
-import pandas as pd
-import pyarrow.parquet as pq
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from Lazy_Imports import lazy_import
+
+pd = lazy_import('pandas')
+pq = lazy_import('pyarrow.parquet')
+
+# Excel acceptă 1.048.576 rânduri pe foaie, dintre care unul este antetul
+EXCEL_MAX_ROWS = 1_048_575
+EXCEL_MAX_CELL_LENGTH = 32_767
+BATCH_SIZE = 10_000
 
 def convert_parquet_to_excel():
     # Citim fișierul parquet
+    input_file = 'veridion_product_deduplication_challenge.snappy.parquet'
+    output_file = 'veridion_product_deduplication_challenge.xlsx'
+
+    # Peste limita Excel scriem mai multe fișiere, în paralel
+    if pq.ParquetFile(input_file).metadata.num_rows > EXCEL_MAX_ROWS:
+        print("Fișierul depășește limita de rânduri Excel, se exportă pe bucăți...")
+        return export_parquet_shards(input_file, 'veridion_product_deduplication_challenge')
+
     print("Se citește fișierul parquet...")
-    df = pd.read_parquet('veridion_product_deduplication_challenge.snappy.parquet')
-    
+    df = pd.read_parquet(input_file)
+
     # Salvăm în Excel
-    output_file = 'veridion_product_deduplication_challenge.xlsx'
     print(f"Se salvează în Excel: {output_file}")
     df.to_excel(output_file, index=False)
     print("Conversie finalizată cu succes!")
 
-if __name__ == "__main__":
-    convert_parquet_to_excel()
+def plan_shards(input_file, rows_per_shard=EXCEL_MAX_ROWS):
+    """Împarte rândurile fișierului în intervale [start, stop) de cel mult rows_per_shard"""
+    total_rows = pq.ParquetFile(input_file).metadata.num_rows
+    return [(start, min(start + rows_per_shard, total_rows)) for start in range(0, total_rows, rows_per_shard)]
+
+def iter_row_range(input_file, start, stop, batch_size=BATCH_SIZE):
+    """Citește în flux doar row group-urile care acoperă intervalul [start, stop)"""
+    parquet_file = pq.ParquetFile(input_file)
+    metadata = parquet_file.metadata
+    row_groups = []
+    first_row = None
+    position = 0
+    for rg in range(metadata.num_row_groups):
+        rg_rows = metadata.row_group(rg).num_rows
+        if position < stop and position + rg_rows > start:
+            row_groups.append(rg)
+            first_row = position if first_row is None else first_row
+        position += rg_rows
+    if not row_groups:
+        return
 
+    position = first_row
+    for batch in parquet_file.iter_batches(batch_size=batch_size, row_groups=row_groups):
+        batch_start, batch_stop = position, position + batch.num_rows
+        position = batch_stop
+        low, high = max(start, batch_start), min(stop, batch_stop)
+        if high > low:
+            yield batch.slice(low - batch_start, high - low)
 
+def excel_cell(value):
+    """Valorile pe care Excel nu le poate stoca direct sunt transformate în text"""
+    if isinstance(value, (list, tuple, dict)):
+        value = str(value)
+    if isinstance(value, str) and len(value) > EXCEL_MAX_CELL_LENGTH:
+        value = value[:EXCEL_MAX_CELL_LENGTH]
+    return value
+
+def write_xlsx(batches, output_file, column_names):
+    """Scrie rândurile în flux, cu un motor write-only (xlsxwriter sau openpyxl)"""
+    rows = 0
+    try:
+        import xlsxwriter
+        # Fără strings_to_urls, fiecare page_url devine hyperlink, iar Excel acceptă cel mult
+        # 65.530 pe foaie; după limită write_row se oprește la celula URL și pierde restul rândului.
+        # Textele care încep cu '=' rămân text, nu formule
+        workbook = xlsxwriter.Workbook(output_file, {
+            'constant_memory': True, 'nan_inf_to_errors': True,
+            'strings_to_urls': False, 'strings_to_formulas': False,
+        })
+        worksheet = workbook.add_worksheet()
+        worksheet.write_row(0, 0, column_names)
+        for batch in batches:
+            for row in zip(*(batch.column(n).to_pylist() for n in range(batch.num_columns))):
+                if worksheet.write_row(rows + 1, 0, [excel_cell(v) for v in row]) != 0:
+                    raise ValueError(f"Rândul {rows + 1} nu a putut fi scris complet în {output_file}")
+                rows += 1
+        workbook.close()
+    except ImportError:
+        import openpyxl
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet()
+        worksheet.append(column_names)
+        for batch in batches:
+            for row in zip(*(batch.column(n).to_pylist() for n in range(batch.num_columns))):
+                rows += 1
+                worksheet.append([excel_cell(v) for v in row])
+        workbook.save(output_file)
+    return rows
+
+def write_csv(batches, output_file, column_names):
+    """Scrie rândurile în flux într-un fișier CSV"""
+    rows = 0
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(column_names)
+        for batch in batches:
+            columns = [batch.column(n).to_pylist() for n in range(batch.num_columns)]
+            writer.writerows(zip(*columns))
+            rows += batch.num_rows
+    return rows
+
+def write_shard(task):
+    """Exportă un interval de rânduri într-un fișier; rulează într-un proces separat"""
+    start_time = time.time()
+    column_names = pq.ParquetFile(task['input_file']).schema_arrow.names
+    batches = iter_row_range(task['input_file'], task['start'], task['stop'])
+    writer = write_csv if task['format'] == 'csv' else write_xlsx
+    rows = writer(batches, task['output_file'], column_names)
+    return {
+        'shard': task['shard'],
+        'file': task['output_file'],
+        'rows': rows,
+        'seconds': time.time() - start_time,
+    }
+
+def export_parquet_shards(input_file, output_prefix, file_format='xlsx', rows_per_shard=EXCEL_MAX_ROWS, workers=None):
+    """Exportă fișierul parquet în mai multe fișiere xlsx/csv, scrise în paralel"""
+    start_time = time.time()
+    if file_format == 'xlsx':
+        rows_per_shard = min(rows_per_shard, EXCEL_MAX_ROWS)
+    shards = plan_shards(input_file, rows_per_shard)
+    tasks = [{
+        'shard': n,
+        'input_file': input_file,
+        'start': start,
+        'stop': stop,
+        'format': file_format,
+        'output_file': f"{output_prefix}_{n + 1:03d}.{file_format}",
+    } for n, (start, stop) in enumerate(shards)]
+    print(f"Se exportă {len(tasks)} fișiere {file_format} ({rows_per_shard} rânduri maxim per fișier)...")
+
+    with ProcessPoolExecutor(max_workers=workers or min(len(tasks), os.cpu_count()) or 1) as executor:
+        report = list(executor.map(write_shard, tasks))
+
+    print(f"{'Fișier':<50}{'Rânduri':>12}{'Timp (s)':>10}")
+    for shard in report:
+        print(f"{shard['file']:<50}{shard['rows']:>12}{shard['seconds']:>10.2f}")
+    total_rows = sum(shard['rows'] for shard in report)
+    print(f"Total: {total_rows} rânduri în {len(report)} fișiere, {time.time() - start_time:.2f} secunde")
+    return report
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversie parquet -> Excel")
+    parser.add_argument('--sharded', action='store_true', help="exportă pe bucăți, în paralel")
+    parser.add_argument('--input', default='veridion_product_deduplication_challenge.snappy.parquet')
+    parser.add_argument('--output-prefix', default='veridion_product_deduplication_challenge')
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx')
+    parser.add_argument('--rows-per-shard', type=int, default=EXCEL_MAX_ROWS)
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+    if args.sharded:
+        export_parquet_shards(args.input, args.output_prefix, args.format, args.rows_per_shard, args.workers)
+    else:
+        convert_parquet_to_excel()
@@ -1,10 +1,18 @@
-import pandas as pd
-import pyarrow.parquet as pq
+import argparse
 import time
+from Lazy_Imports import lazy_import
+from Convert import EXCEL_MAX_ROWS, export_parquet_shards
+
+pq = lazy_import('pyarrow.parquet')
 
 def convert_parquet_to_excel():
     print("Începe conversia fișierelor parquet în Excel...")
     
+    # Peste limita Excel exportăm în mai multe fișiere, scrise în paralel
+    if pq.ParquetFile('veridion_product_deduplication_challenge.snappy.parquet').metadata.num_rows > EXCEL_MAX_ROWS:
+        export_parquet_shards('veridion_product_deduplication_challenge.snappy.parquet', '1')
+        return
+    
     # Citim fișierele parquet
     print("Se citesc fișierele parquet...")
     table1 = pq.read_table('veridion_product_deduplication_challenge.snappy.parquet')
@@ -22,6 +30,7 @@ def convert_parquet_to_excel():
    
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Conversie parquet -> Excel, cu timpul total").parse_args()
     start_time = time.time()
     convert_parquet_to_excel()
     end_time = time.time()
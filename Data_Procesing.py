@@ -1,13 +1,15 @@
-import pandas as pd 
-import numpy as np 
-import pyarrow.parquet as pq
-from fuzzywuzzy import fuzz 
 from collections import defaultdict
 import logging
-from tqdm import tqdm
-import warnings
+import argparse
+from Lazy_Imports import lazy_import, tqdm
+from Exact_Duplicates import collapse_exact_duplicates, expand_groups, compute_row_hashes, write_cluster_mapping
+from Score_Cache import ScoreCache
 import os
 
+# Dependențele grele se încarcă doar la prima folosire
+pd = lazy_import('pandas')
+fuzz = lazy_import('fuzzywuzzy.fuzz')
+
 # Configurare logging
 logging.basicConfig(
     level=logging.INFO,
@@ -93,7 +95,11 @@ def merge_descriptions(descriptions):
         logger.error(f"Eroare la combinarea descrierilor: {str(e)}")
         return ""
 
-def find_duplicates_new(df):
+# Numele comparatorului folosit ca parte din cheia cache-ului de scoruri.
+# fuzz.partial_ratio depinde de ordinea argumentelor, deci cheile păstrează ordinea (i, j)
+CACHE_COMPARATOR = 'fuzz_min_title_name_ordered'
+
+def find_duplicates_new(df, threshold=0.85, cache=None):
    
     logger.info("Începe identificarea duplicatelor...")
     
@@ -101,6 +107,8 @@ def find_duplicates_new(df):
         similarity_groups = defaultdict(list)
         processed_indices = set()
         total_rows = len(df)
+        if cache is not None:
+            row_hashes = compute_row_hashes(df, ['product_title', 'product_name'])
         
         for i in tqdm(range(total_rows), desc="Analiză duplicate"):
             if i in processed_indices:
@@ -114,12 +122,21 @@ def find_duplicates_new(df):
                 if j in processed_indices:
                     continue
                 
-                # Calculăm similaritatea pentru ambele coloane
-                title_similarity = calculate_similarity(current_title, df.iloc[j]['product_title'])
-                name_similarity = calculate_similarity(current_name, df.iloc[j]['product_name'])
+                def compute_similarity():
+                    # Calculăm similaritatea pentru ambele coloane
+                    title_similarity = calculate_similarity(current_title, df.iloc[j]['product_title'])
+                    name_similarity = calculate_similarity(current_name, df.iloc[j]['product_name'])
+                    return min(title_similarity, name_similarity)
+                
+                if cache is not None:
+                    pair_similarity = cache.get_or_compute(
+                        row_hashes[i], row_hashes[j], CACHE_COMPARATOR, compute_similarity, symmetric=False
+                    )
+                else:
+                    pair_similarity = compute_similarity()
                 
                 # Considerăm duplicate dacă ambele coloane sunt similare
-                if title_similarity > 0.85 and name_similarity > 0.85:
+                if pair_similarity > threshold:
                     current_group.append(j)
                     processed_indices.add(j)
             
@@ -135,8 +152,9 @@ def find_duplicates_new(df):
         logger.error(f"Eroare la identificarea duplicatelor: {str(e)}")
         raise
 
-def process_data():
+def process_data(threshold=0.85, cache_path=None):
     """Procesează fișierul Excel și salvează rezultatele"""
+    cache = ScoreCache(cache_path) if cache_path else None
     try:
         
         excel_files = [f for f in os.listdir('.') if f.endswith('.xlsx') and not f.startswith('~$')]
@@ -158,7 +176,16 @@ def process_data():
         if missing_columns:
             raise ValueError(f"Coloanele necesare nu există în fișier: {missing_columns}")
         
-        duplicate_groups = find_duplicates_new(df)
+        # Duplicatele exacte nu mai trec prin comparația fuzzy
+        # Un titlu sau nume lipsă dă scor 0, deci acele rânduri nu sunt unificate direct
+        unique_df, representatives, exact_groups = collapse_exact_duplicates(
+            df, ['product_title', 'product_name'], collapse_nulls=False
+        )
+        fuzzy_groups = find_duplicates_new(unique_df, threshold=threshold, cache=cache)
+        duplicate_groups = {
+            f"group_{n}": indices
+            for n, indices in enumerate(expand_groups(fuzzy_groups.values(), representatives, exact_groups))
+        }
         
        
         logger.info("Procesare grupurile de duplicate...")
@@ -188,6 +215,7 @@ def process_data():
         logger.info("Creare și salvare rezultat final...")
         result_df = pd.DataFrame(result_rows)
         result_df.to_excel('Rezult.xlsx', index=False)
+        write_cluster_mapping(duplicate_groups.values(), len(df), 'Rezult.xlsx')
         
         # Afișăm statistici
         logger.info(f"\nStatistici finale:")
@@ -195,6 +223,8 @@ def process_data():
         logger.info(f"Număr final de rânduri: {len(result_df)}")
         logger.info(f"Reducere: {((len(df) - len(result_df)) / len(df) * 100):.2f}%")
         logger.info(f"Rezultate salvate în: Rezult.xlsx")
+        if cache is not None:
+            logger.info(f"Cache scoruri: {cache.report()}")
         
         return result_df
     
@@ -202,11 +232,18 @@ def process_data():
         logger.error("Eroare în procesul de analiză:")
         logger.exception(e)
         raise
+    finally:
+        if cache is not None:
+            cache.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicare produse după product_title și product_name")
+    parser.add_argument('--threshold', type=float, default=0.85)
+    parser.add_argument('--cache', default=None, help="fișier SQLite pentru cache-ul de scoruri")
+    args = parser.parse_args()
     try:
         logger.info("Începe procesarea fișierului Excel...")
-        result_df = process_data()
+        result_df = process_data(threshold=args.threshold, cache_path=args.cache)
         logger.info("Procesare finalizată cu succes!")
     except FileNotFoundError as e:
         logger.error(f"Fișierul nu a fost găsit: {str(e)}")
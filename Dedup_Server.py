@@ -0,0 +1,328 @@
+import argparse
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from Lazy_Imports import lazy_import
+from Data_Procesing import preprocess_text
+from Process_Parquet import preprocess_url
+from Scheduler import SUB_BLOCK_LEVELS, url_path_prefix
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+fuzz_utils = lazy_import('fuzzywuzzy.utils')
+Levenshtein = lazy_import('Levenshtein')
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Limita de candidați comparați pentru un produs, ca latența să rămână mică
+MAX_CANDIDATES = 2000
+
+# Domeniile mai mari decât limita sunt restrânse după prefixul căii din URL, ca în Scheduler
+PATH_DEPTHS = [depth for kind, depth in SUB_BLOCK_LEVELS if kind == 'path']
+
+
+class BadRequest(ValueError):
+    """Cerere cu un corp JSON valid, dar de altă formă decât cea așteptată"""
+
+
+def normalized_field(text):
+    """Textul deja preprocesat și forma cu tokenii sortați folosită de fuzz.token_sort_ratio"""
+    return text, ' '.join(sorted(fuzz_utils.full_process(text, force_ascii=True).split()))
+
+
+def fuzz_ratio(text1, text2):
+    """fuzz.ratio fără decoratorii din fuzzywuzzy, cu același rezultat"""
+    if text1 == text2:
+        return 100
+    if not text1 or not text2:
+        return 0
+    return int(round(100 * Levenshtein.ratio(text1, text2)))
+
+
+def fuzz_partial_ratio(text1, text2):
+    """fuzz.partial_ratio pe funcțiile Levenshtein, fără obiectele StringMatcher, cu același rezultat"""
+    if text1 == text2:
+        return 100
+    if not text1 or not text2:
+        return 0
+    shorter, longer = (text1, text2) if len(text1) <= len(text2) else (text2, text1)
+    opcodes = Levenshtein.opcodes(shorter, longer)
+    best = 0
+    for shorter_start, longer_start, _ in Levenshtein.matching_blocks(opcodes, shorter, longer):
+        start = max(longer_start - shorter_start, 0)
+        ratio = Levenshtein.ratio(shorter, longer[start:start + len(shorter)])
+        if ratio > .995:
+            return 100
+        best = max(best, ratio)
+    return int(round(100 * best))
+
+
+def similarity_bound(field1, field2):
+    """Limita superioară a normalized_similarity fără partial_ratio (considerat 100), mult mai ieftină"""
+    (text1, sorted1), (text2, sorted2) = field1, field2
+    if text1 == text2:
+        return 1.0 if text1 else 0
+    if not text1 or not text2:
+        return 0
+    return (fuzz_ratio(text1, text2) * 0.4 + 40 + fuzz_ratio(sorted1, sorted2) * 0.2) / 100.0
+
+
+def normalized_similarity(field1, field2):
+    """Scorul din calculate_similarity / calculate_url_similarity pentru câmpuri normalized_field.
+
+    Indexul păstrează valorile preprocesate și tokenii sortați, deci comparația sare peste
+    preprocesarea repetată la fiecare candidat; ponderile sunt aceleași ca în pipeline-uri.
+    """
+    (text1, sorted1), (text2, sorted2) = field1, field2
+    if text1 == text2:
+        return 1.0 if text1 else 0
+    if not text1 or not text2:
+        return 0
+    ratio = fuzz_ratio(text1, text2)
+    partial_ratio = fuzz_partial_ratio(text1, text2)
+    token_sort_ratio = fuzz_ratio(sorted1, sorted2)
+    return (ratio * 0.4 + partial_ratio * 0.4 + token_sort_ratio * 0.2) / 100.0
+
+
+def read_products(path):
+    """Citește produsele din parquet, Excel sau CSV, după extensie"""
+    if path.endswith('.parquet'):
+        return pd.read_parquet(path)
+    if path.endswith('.csv'):
+        return pd.read_csv(path)
+    return pd.read_excel(path)
+
+
+class MatchIndex:
+    """Indexul ținut în memorie: câmpurile normalizate, blocarea și id-urile de cluster"""
+
+    def __init__(self, df, cluster_ids=None, source=None, clusters_path=None):
+        self.source = source
+        self.clusters_path = clusters_path
+        self.loaded_at = time.time()
+        self.size = len(df)
+        self.domains = self.column(df, 'root_domain')
+        self.urls = [normalized_field(preprocess_url(url)) for url in self.column(df, 'page_url')]
+        self.titles = [normalized_field(preprocess_text(title)) for title in self.column(df, 'product_title')]
+        self.names = [normalized_field(preprocess_text(name)) for name in self.column(df, 'product_name')]
+        self.cluster_ids = np.arange(len(df)) if cluster_ids is None else np.asarray(cluster_ids)
+
+        # Blocarea: după root_domain, iar fără domeniu după primul cuvânt din titlu
+        self.by_domain = defaultdict(list)
+        self.by_title_token = defaultdict(list)
+        for position in range(len(df)):
+            if not pd.isna(self.domains[position]):
+                self.by_domain[self.domains[position]].append(position)
+            title = self.titles[position][0]
+            if title:
+                self.by_title_token[title.split()[0]].append(position)
+
+        # Sub-blocurile după calea URL, doar pentru domeniile peste limită
+        self.by_domain_path = defaultdict(list)
+        for domain, positions in self.by_domain.items():
+            if len(positions) <= MAX_CANDIDATES:
+                continue
+            for depth in PATH_DEPTHS:
+                for position in positions:
+                    self.by_domain_path[(domain, depth, url_path_prefix(self.urls[position][0], depth))].append(position)
+
+    @staticmethod
+    def column(df, name):
+        return df[name].tolist() if name in df.columns else [None] * len(df)
+
+    @classmethod
+    def load(cls, path, clusters_path=None):
+        """Construiește indexul dintr-un fișier de produse și, opțional, maparea rând -> cluster"""
+        start_time = time.time()
+        df = read_products(path)
+        cluster_ids = None
+        if clusters_path:
+            mapping = pd.read_csv(clusters_path)
+            cluster_ids = np.arange(len(df))
+            cluster_ids[mapping['row'].to_numpy()] = mapping['cluster_id'].to_numpy()
+        index = cls(df, cluster_ids, source=path, clusters_path=clusters_path)
+        logger.info(f"Index încărcat din {path}: {index.size} produse, {len(index.by_domain)} domenii, "
+                    f"{time.time() - start_time:.2f}s")
+        return index
+
+    def candidates(self, product):
+        """Blocul din care se aleg candidații: root_domain (restrâns după cale la domeniile mari),
+        iar pentru domenii lipsă sau necunoscute indexului, primul cuvânt din titlu"""
+        domain = product.get('root_domain')
+        if domain and domain in self.by_domain:
+            candidates = self.by_domain[domain]
+            url = product.get('page_url')
+            for depth in PATH_DEPTHS:
+                if len(candidates) <= MAX_CANDIDATES or not url:
+                    break
+                candidates = self.by_domain_path.get((domain, depth, url_path_prefix(url, depth)), [])
+            return candidates
+        title = preprocess_text(product.get('product_title'))
+        return self.by_title_token.get(title.split()[0], []) if title else []
+
+    def match(self, product, threshold=0.85):
+        """Cel mai bun cluster pentru un produs nou, cu scorurile folosite de pipeline-uri.
+
+        Un produs este duplicat dacă URL-ul e similar (regula din Process_Parquet)
+        sau dacă atât titlul, cât și numele sunt similare (regula din Data_Procesing).
+        """
+        url = normalized_field(preprocess_url(product.get('page_url')))
+        title = normalized_field(preprocess_text(product.get('product_title')))
+        name = normalized_field(preprocess_text(product.get('product_name')))
+
+        best = None
+        candidates = self.candidates(product)
+        truncated = len(candidates) > MAX_CANDIDATES
+        if truncated:
+            logger.warning(f"{len(candidates)} candidați pentru {product.get('root_domain')!r}, "
+                           f"se compară doar primii {MAX_CANDIDATES}")
+        for position in candidates[:MAX_CANDIDATES]:
+            # Rândurile care nu pot întrece cel mai bun candidat nici după limita superioară sunt sărite
+            if best is not None and max(similarity_bound(url, self.urls[position]),
+                                        similarity_bound(title, self.titles[position])) <= best['score']:
+                continue
+            scores = {
+                'url': normalized_similarity(url, self.urls[position]),
+                'title': normalized_similarity(title, self.titles[position]),
+            }
+            # min(titlu, nume) nu depășește scorul titlului, deci numele contează doar
+            # dacă rândul mai poate întrece cel mai bun candidat de până acum
+            if best is not None and max(scores['url'], scores['title']) <= best['score']:
+                continue
+            scores['name'] = normalized_similarity(name, self.names[position])
+            score = max(scores['url'], min(scores['title'], scores['name']))
+            if best is None or score > best['score']:
+                best = {'row': position, 'score': score, 'scores': scores}
+
+        if best is None:
+            return {'cluster_id': None, 'is_duplicate': False, 'candidates': 0, 'truncated': False}
+        return {
+            'cluster_id': int(self.cluster_ids[best['row']]),
+            'row': best['row'],
+            'score': best['score'],
+            'scores': best['scores'],
+            'is_duplicate': best['score'] > threshold,
+            'candidates': len(candidates),
+            # Cu truncated=True un duplicat real poate lipsi din candidații comparați
+            'truncated': truncated,
+        }
+
+
+class DedupService:
+    """Ține indexul curent; reîncărcarea construiește un index nou și îl înlocuiește atomic"""
+
+    def __init__(self, index, threshold=0.85, allow_any_path=False):
+        self.index = index
+        self.threshold = threshold
+        self.allow_any_path = allow_any_path
+        self.reload_lock = threading.Lock()
+
+    def match(self, product):
+        return self.index.match(product, self.threshold)
+
+    def match_batch(self, products):
+        index = self.index
+        return [index.match(product, self.threshold) for product in products]
+
+    def reload(self, path=None, clusters_path=None):
+        """Reîncarcă indexul; implicit din aceleași fișiere, inclusiv maparea pe clustere.
+
+        Alte fișiere decât cele configurate sunt acceptate doar cu allow_any_path.
+        """
+        with self.reload_lock:
+            index = self.index
+            path = path or index.source
+            clusters_path = clusters_path or index.clusters_path
+            if not self.allow_any_path and (path, clusters_path) != (index.source, index.clusters_path):
+                raise PermissionError("Reîncărcarea din alte fișiere nu este permisă (--allow-reload-paths)")
+            # Cererile în curs folosesc în continuare indexul vechi până la înlocuire
+            self.index = MatchIndex.load(path, clusters_path)
+        return self.health()
+
+    def health(self):
+        index = self.index
+        return {'status': 'ok', 'products': index.size, 'source': index.source,
+                'clusters': index.clusters_path, 'loaded_at': index.loaded_at}
+
+
+class DedupRequestHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path == '/health':
+            self.send_json(200, self.service.health())
+        else:
+            self.send_json(404, {'error': f"Rută necunoscută: {self.path}"})
+
+    def do_POST(self):
+        try:
+            payload = self.read_json()
+            if not isinstance(payload, dict):
+                raise BadRequest("Corpul cererii trebuie să fie un obiect JSON")
+            if self.path == '/match':
+                self.send_json(200, self.service.match(payload))
+            elif self.path == '/match/batch':
+                products = payload.get('products', [])
+                if not isinstance(products, list) or not all(isinstance(p, dict) for p in products):
+                    raise BadRequest("Câmpul products trebuie să fie o listă de obiecte JSON")
+                self.send_json(200, {'results': self.service.match_batch(products)})
+            elif self.path == '/reload':
+                self.send_json(200, self.service.reload(payload.get('path'), payload.get('clusters')))
+            else:
+                self.send_json(404, {'error': f"Rută necunoscută: {self.path}"})
+        except json.JSONDecodeError as e:
+            self.send_json(400, {'error': f"JSON invalid: {str(e)}"})
+        except BadRequest as e:
+            self.send_json(400, {'error': str(e)})
+        except PermissionError as e:
+            self.send_json(403, {'error': str(e)})
+        except Exception as e:
+            logger.exception("Eroare la procesarea cererii")
+            self.send_json(500, {'error': str(e)})
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+def create_server(service, host='127.0.0.1', port=8080):
+    handler = type('BoundDedupRequestHandler', (DedupRequestHandler,), {'service': service})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Server local pentru verificarea duplicatelor")
+    parser.add_argument('--input', default='veridion_product_deduplication_challenge.snappy.parquet')
+    parser.add_argument('--clusters', default=None, help="CSV cu coloanele row și cluster_id")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--threshold', type=float, default=0.85)
+    parser.add_argument('--allow-reload-paths', action='store_true',
+                        help="permite /reload din alte fișiere decât --input și --clusters")
+    args = parser.parse_args()
+
+    service = DedupService(MatchIndex.load(args.input, args.clusters), args.threshold, args.allow_reload_paths)
+    server = create_server(service, args.host, args.port)
+    logger.info(f"Server pornit pe http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Server oprit")
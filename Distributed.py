@@ -0,0 +1,378 @@
+import argparse
+import ipaddress
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Process
+from multiprocessing.managers import BaseManager
+
+from Lazy_Imports import lazy_import
+from Clusters import connected_labels
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_ADDRESS = ('127.0.0.1', 50000)
+DEFAULT_AUTHKEY = b'product-dedup'
+# Variabila de mediu din care se citește cheia clusterului, ca să nu apară în linia de comandă
+AUTHKEY_ENV = 'DEDUP_AUTHKEY'
+# Cât așteaptă coordonatorul o partiție înainte s-o retrimită, și de câte ori o încearcă
+DEFAULT_TASK_TIMEOUT = 600
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+def is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def check_authkey(address, authkey):
+    """Refuză cheia implicită pe adrese care nu sunt loopback.
+
+    Cheia implicită e publică, iar managerul deserializează (pickle) ce primește
+    prin rețea, deci în afara mașinii locale e nevoie de o cheie proprie.
+    """
+    if authkey == DEFAULT_AUTHKEY and not is_loopback(address[0]):
+        raise ValueError(f"Adresa {address[0]} nu este loopback: setați o cheie proprie cu --authkey "
+                         f"sau variabila de mediu {AUTHKEY_ENV}")
+
+
+def partition_rows(df, key='root_domain', num_partitions=8):
+    """Împarte pozițiile rândurilor în partiții după hash-ul cheii de blocare.
+
+    Toate rândurile cu aceeași valoare a cheii ajung în aceeași partiție, inclusiv
+    cele fără cheie, care formează un bloc propriu.
+    """
+    from Exact_Duplicates import NULL_MARKER
+
+    values = df[key].astype(object)
+    keys = values.where(values.notna(), NULL_MARKER).astype(str).to_numpy(dtype=object)
+    partition_ids = pd.util.hash_array(keys) % np.uint64(num_partitions)
+    return [np.flatnonzero(partition_ids == p) for p in range(num_partitions)]
+
+
+def build_tasks(df, partitions, key='root_domain', url_column='page_url', threshold=0.85):
+    """Pregătește sarcinile trimise către workeri: doar coloanele necesare, ca liste simple"""
+    keys = df[key].to_numpy(dtype=object)
+    urls = df[url_column].to_numpy(dtype=object)
+    tasks = []
+    for partition_id, positions in enumerate(partitions):
+        if len(positions) == 0:
+            continue
+        tasks.append({
+            'partition_id': partition_id,
+            'positions': positions.tolist(),
+            'keys': keys[positions].tolist(),
+            'urls': urls[positions].tolist(),
+            'threshold': threshold,
+        })
+    return tasks
+
+
+def process_partition(task):
+    """Blocare + scorare pe o partiție; rulează în procesul worker.
+
+    Sarcina aduce fie cheile de blocare (keys), fie blocurile deja construite de
+    Scheduler.plan_tasks (blocks: listă de (cheie, poziții, urls)).
+    Întoarce muchiile (ancoră, membru) în poziții globale și statisticile partiției.
+    """
+    from Process_Parquet import find_similar_in_block
+
+    start_time = time.time()
+    if 'blocks' in task:
+        blocks = task['blocks']
+    else:
+        members_by_key = defaultdict(list)
+        for n, block_key in enumerate(task['keys']):
+            # Rândurile fără cheie de blocare formează un bloc propriu, ca în find_similar_products
+            members_by_key[None if pd.isna(block_key) else block_key].append(n)
+        blocks = [
+            ((block_key,), [task['positions'][n] for n in members], [task['urls'][n] for n in members])
+            for block_key, members in members_by_key.items() if len(members) > 1
+        ]
+
+    edges = []
+    block_stats = []
+    for block_key, positions, urls in blocks:
+        block_start = time.time()
+        for group in find_similar_in_block(positions, urls, task['threshold']):
+            edges.extend((group[0], member) for member in group[1:])
+        block_stats.append({
+            'block': block_key,
+            'rows': len(positions),
+            'seconds': time.time() - block_start,
+            'worker_pid': os.getpid(),
+        })
+
+    stats = {
+        'partition_id': task['partition_id'],
+        'rows': len(task['positions']) if 'positions' in task else sum(len(p) for _, p, _ in blocks),
+        'blocks': len(blocks),
+        'edges': len(edges),
+        'seconds': time.time() - start_time,
+        'worker_pid': os.getpid(),
+        'block_stats': block_stats,
+    }
+    return task['partition_id'], edges, stats
+
+
+def run_tasks(backend, tasks):
+    """Trimite sarcinile către backend și adună muchiile și statisticile partițiilor"""
+    edges = []
+    partition_stats = []
+    for _, partition_edges, stats in backend.run(tasks):
+        edges.extend(partition_edges)
+        partition_stats.append(stats)
+        logger.info(f"Partiția {stats['partition_id']}: {stats['rows']} rânduri, "
+                    f"{stats['blocks']} blocuri, {stats['seconds']:.2f}s (worker {stats['worker_pid']})")
+    slowest = max((s['seconds'] for s in partition_stats), default=0)
+    logger.info(f"Partiții procesate: {len(partition_stats)}, cea mai lentă: {slowest:.2f}s")
+    return edges, partition_stats
+
+
+def resolve_clusters(edges, total_rows, extra_pairs=None):
+    """Pasul global de reduce: union-find peste muchiile din toate partițiile.
+
+    extra_pairs poate aduce legături între partiții (de ex. duplicate exacte).
+    Grupurile sunt ordonate după primul rând, ca în find_similar_products.
+    """
+    pairs = np.array(edges, dtype=np.int64).reshape(-1, 2)
+    if extra_pairs is not None and len(extra_pairs):
+        pairs = np.concatenate([pairs, np.asarray(extra_pairs, dtype=np.int64).reshape(-1, 2)])
+    labels = connected_labels(pairs, total_rows)
+
+    similarity_groups = defaultdict(list)
+    for _, members in sorted(pd.Series(np.arange(total_rows)).groupby(labels).indices.items()):
+        if len(members) > 1:
+            similarity_groups[f"group_{len(similarity_groups)}"] = members.tolist()
+    return similarity_groups
+
+
+def exact_link_pairs(df, columns):
+    """Legături între rândurile identice pe coloanele date, indiferent de partiție"""
+    from Exact_Duplicates import compute_row_hashes
+
+    hashes = compute_row_hashes(df, columns)
+    pairs = []
+    for members in pd.Series(np.arange(len(df))).groupby(hashes).indices.values():
+        pairs.extend((members[0], member) for member in members[1:])
+    return pairs
+
+
+class LocalBackend:
+    """Workeri locali într-un ProcessPoolExecutor"""
+
+    def __init__(self, n_workers=None):
+        self.n_workers = n_workers or os.cpu_count()
+
+    def run(self, tasks):
+        with ProcessPoolExecutor(max_workers=self.n_workers) as executor:
+            futures = [executor.submit(process_partition, task) for task in tasks]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def close(self):
+        pass
+
+
+class QueueManager(BaseManager):
+    pass
+
+
+class ClusterBackend:
+    """Coordonator care servește sarcinile prin rețea pentru workeri de pe alte mașini.
+
+    Workerii se conectează cu run_worker(address, authkey) și preiau sarcini până
+    primesc semnalul de oprire, trimis doar de close(). O sarcină fără rezultat după
+    `timeout` secunde (worker oprit sau blocat) este retrimisă, de cel mult
+    `max_attempts` ori în total.
+    """
+
+    def __init__(self, address=DEFAULT_ADDRESS, authkey=DEFAULT_AUTHKEY, timeout=DEFAULT_TASK_TIMEOUT,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        check_authkey(address, authkey)
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.next_task_id = 0
+        self.task_queue = queue.Queue()
+        self.result_queue = queue.Queue()
+
+        QueueManager.register('get_tasks', callable=lambda: self.task_queue)
+        QueueManager.register('get_results', callable=lambda: self.result_queue)
+        self.server = QueueManager(address=address, authkey=authkey).get_server()
+        self.address = self.server.address
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        logger.info(f"Coordonator pornit pe {self.address[0]}:{self.address[1]}")
+
+    def submit(self, task_id, task):
+        self.task_queue.put((task_id, task))
+        return time.time() + self.timeout
+
+    def run(self, tasks):
+        # task_id -> (sarcina, încercări, termen); id-urile sunt unice între rulări,
+        # ca rezultatele întârziate dintr-o rulare anterioară să fie ignorate
+        pending = {}
+        for task in tasks:
+            task_id = self.next_task_id
+            self.next_task_id += 1
+            pending[task_id] = (task, 1, self.submit(task_id, task))
+
+        while pending:
+            wait = min(deadline for _, _, deadline in pending.values()) - time.time()
+            try:
+                task_id, (partition_id, edges, stats) = self.result_queue.get(timeout=max(wait, 0))
+            except queue.Empty:
+                now = time.time()
+                for task_id, (task, attempts, deadline) in list(pending.items()):
+                    if deadline > now:
+                        continue
+                    if attempts >= self.max_attempts:
+                        raise TimeoutError(f"Partiția {task['partition_id']} nu a terminat după "
+                                           f"{attempts} încercări de câte {self.timeout}s")
+                    logger.warning(f"Partiția {task['partition_id']} a depășit {self.timeout}s, se retrimite")
+                    pending[task_id] = (task, attempts + 1, self.submit(task_id, task))
+                continue
+
+            if task_id not in pending:
+                # Rezultat duplicat al unei sarcini retrimise sau dintr-o rulare anterioară
+                continue
+            if 'error' in stats:
+                raise RuntimeError(f"Worker-ul a eșuat pe partiția {partition_id}: {stats['error']}")
+            del pending[task_id]
+            yield partition_id, edges, stats
+
+    def close(self):
+        """Semnalul de oprire pentru workeri; fiecare worker îl pune înapoi pentru următorul"""
+        self.task_queue.put(None)
+
+
+def run_worker(address=DEFAULT_ADDRESS, authkey=DEFAULT_AUTHKEY):
+    """Bucla unui worker: preia partiții de la coordonator și trimite înapoi muchiile"""
+    check_authkey(address, authkey)
+    QueueManager.register('get_tasks')
+    QueueManager.register('get_results')
+    manager = QueueManager(address=tuple(address), authkey=authkey)
+    manager.connect()
+    tasks = manager.get_tasks()
+    results = manager.get_results()
+    logger.info(f"Worker {os.getpid()} conectat la {address[0]}:{address[1]}")
+
+    while True:
+        item = tasks.get()
+        if item is None:
+            tasks.put(None)
+            break
+        task_id, task = item
+        try:
+            results.put((task_id, process_partition(task)))
+        except Exception as e:
+            logger.error(f"Eroare pe partiția {task['partition_id']}: {str(e)}")
+            results.put((task_id, (task['partition_id'], [], {'error': str(e)})))
+
+
+def start_local_cluster(backend, n_workers):
+    """Pornește n_workers procese worker pe aceeași mașină, conectate prin rețea"""
+    workers = [Process(target=run_worker, args=(backend.address, backend.authkey), daemon=True)
+               for _ in range(n_workers)]
+    for worker in workers:
+        worker.start()
+    return workers
+
+
+def find_similar_products_distributed(df, backend=None, num_partitions=None, threshold=0.85,
+                                      key='root_domain', link_columns=None):
+    """Varianta distribuită a Process_Parquet.find_similar_products.
+
+    Partițiile sunt procesate de backend (LocalBackend sau ClusterBackend), iar
+    grupurile finale sunt rezolvate global. Fără link_columns rezultatul coincide
+    cu cel exhaustiv, pentru că acesta compară doar rânduri cu același root_domain.
+    """
+    logger.info("Începe identificarea distribuită a produselor similare...")
+    try:
+        backend = backend or LocalBackend()
+        num_partitions = num_partitions or 4 * getattr(backend, 'n_workers', os.cpu_count())
+        partitions = partition_rows(df, key, num_partitions)
+        tasks = build_tasks(df, partitions, key, threshold=threshold)
+
+        edges, _ = run_tasks(backend, tasks)
+
+        extra_pairs = exact_link_pairs(df, link_columns) if link_columns else None
+        similarity_groups = resolve_clusters(edges, len(df), extra_pairs)
+        return similarity_groups
+    except Exception as e:
+        logger.error(f"Eroare la identificarea distribuită: {str(e)}")
+        raise
+
+
+def parse_address(value):
+    host, port = value.rsplit(':', 1)
+    return host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicare distribuită pe root_domain")
+    parser.add_argument('mode', choices=['local', 'coordinator', 'worker'],
+                        help="local: workeri pe această mașină; coordinator/worker: cluster prin rețea")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="numărul de workeri locali")
+    parser.add_argument('--partitions', type=int, default=None, help="numărul de partiții")
+    parser.add_argument('--max-block-size', type=int, default=None,
+                        help="împarte munca pe blocuri root_domain (Scheduler), cu blocurile mai mari sparte")
+    parser.add_argument('--address', type=parse_address, default=DEFAULT_ADDRESS, help="host:port coordonator")
+    parser.add_argument('--authkey', default=None,
+                        help=f"cheia comună a clusterului (implicit din {AUTHKEY_ENV}); obligatorie în afara loopback")
+    parser.add_argument('--task-timeout', type=float, default=DEFAULT_TASK_TIMEOUT,
+                        help="secunde după care o partiție fără rezultat este retrimisă altui worker")
+    args = parser.parse_args()
+    authkey = args.authkey or os.environ.get(AUTHKEY_ENV)
+    authkey = authkey.encode() if authkey else DEFAULT_AUTHKEY
+    try:
+        check_authkey(args.address, authkey)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.mode == 'worker':
+        run_worker(args.address, authkey)
+        return
+
+    from Process_Parquet import process_parquet_file
+
+    if args.mode == 'local':
+        # Cluster local complet: coordonator + workeri prin rețea, pe aceeași mașină
+        backend = ClusterBackend(args.address, authkey, args.task_timeout)
+        start_local_cluster(backend, args.workers)
+    else:
+        backend = ClusterBackend(args.address, authkey, args.task_timeout)
+
+    if args.max_block_size:
+        from Scheduler import find_similar_products_scheduled
+
+        def find_groups(df):
+            return find_similar_products_scheduled(df, max_block_size=args.max_block_size, backend=backend)
+    else:
+        def find_groups(df):
+            return find_similar_products_distributed(df, backend, args.partitions)
+
+    try:
+        process_parquet_file(find_groups=find_groups)
+    finally:
+        backend.close()
+
+
+if __name__ == "__main__":
+    main()
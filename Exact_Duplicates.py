@@ -0,0 +1,113 @@
+import logging
+import os
+from Lazy_Imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+# Marcaj pentru valori lipsă, ca NaN să nu coincidă cu textul gol
+NULL_MARKER = '\x00'
+
+
+def normalize_key_columns(df, columns, strip=True):
+    """Normalizează vectorizat coloanele cheie: lowercase și fără spații la capete"""
+    normalized = {}
+    for col in columns:
+        values = df[col]
+        text = values.astype(str).str.lower()
+        if strip:
+            text = text.str.strip()
+        normalized[col] = text.where(values.notna(), NULL_MARKER).to_numpy()
+    return pd.DataFrame(normalized)
+
+
+def compute_row_hashes(df, columns, strip=True):
+    """Calculează un hash pe 64 de biți pentru câmpurile cheie normalizate ale fiecărui rând"""
+    try:
+        normalized = normalize_key_columns(df, columns, strip)
+        return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+    except Exception as e:
+        logger.error(f"Eroare la calculul hash-urilor: {str(e)}")
+        raise
+
+
+def collapse_exact_duplicates(df, columns, strip=True, collapse_nulls=True):
+    """Păstrează un singur reprezentant pentru fiecare grup de rânduri identice.
+
+    Întoarce DataFrame-ul reprezentanților (cu index 0..k-1), pozițiile lor în df
+    și dicționarul poziție reprezentant -> pozițiile tuturor membrilor grupului,
+    doar pentru grupurile cu mai mult de un rând.
+
+    Cu collapse_nulls=False, rândurile cu o valoare lipsă în coloanele cheie nu sunt
+    unificate niciodată: pipeline-urile care dau scor 0 pentru o valoare lipsă nu le
+    consideră duplicate nici atunci când sunt identice.
+    """
+    try:
+        hashes = compute_row_hashes(df, columns, strip)
+        is_duplicate = pd.Index(hashes).duplicated(keep='first')
+        candidates = np.arange(len(df))
+        if not collapse_nulls:
+            has_null = df[list(columns)].isna().any(axis=1).to_numpy()
+            is_duplicate &= ~has_null
+            candidates = np.flatnonzero(~has_null)
+        representatives = np.flatnonzero(~is_duplicate)
+
+        exact_groups = {}
+        if is_duplicate.any():
+            positions = pd.Series(candidates)
+            for members in positions.groupby(hashes[candidates], sort=False).indices.values():
+                if len(members) > 1:
+                    exact_groups[int(candidates[members[0]])] = candidates[members].tolist()
+
+        unique_df = df.iloc[representatives].reset_index(drop=True)
+        logger.info(
+            f"Duplicate exacte: {len(df) - len(unique_df)} rânduri în {len(exact_groups)} grupuri, "
+            f"{len(unique_df)} rânduri rămase pentru comparația fuzzy"
+        )
+        return unique_df, representatives, exact_groups
+    except Exception as e:
+        logger.error(f"Eroare la eliminarea duplicatelor exacte: {str(e)}")
+        raise
+
+
+def expand_groups(groups, representatives, exact_groups):
+    """Transformă grupurile găsite pe reprezentanți în grupuri pe rândurile originale.
+
+    Grupurile exacte care nu au intrat în niciun grup fuzzy devin grupuri separate.
+    """
+    expanded = []
+    used = set()
+    for group in groups:
+        members = []
+        for idx in group:
+            position = int(representatives[idx])
+            members.extend(exact_groups.get(position, [position]))
+            used.add(position)
+        # Ordinea crescătoare contează: unificarea rândurilor depinde de ordinea din grup
+        expanded.append(sorted(members))
+
+    for position, members in exact_groups.items():
+        if position not in used:
+            expanded.append(sorted(members))
+
+    return sorted(expanded, key=lambda members: members[0])
+
+
+def cluster_mapping(groups, total_rows):
+    """Tabelul rând -> cluster_id; rândurile fără duplicate primesc un cluster propriu"""
+    cluster_ids = np.full(total_rows, -1, dtype=np.int64)
+    for cluster_id, group in enumerate(groups):
+        cluster_ids[group] = cluster_id
+    singles = cluster_ids == -1
+    cluster_ids[singles] = np.arange(len(groups), len(groups) + singles.sum())
+    return pd.DataFrame({'row': np.arange(total_rows), 'cluster_id': cluster_ids})
+
+
+def write_cluster_mapping(groups, total_rows, output_file):
+    """Salvează maparea rând -> cluster_id lângă fișierul rezultat, ca <output>_clusters.csv"""
+    path = f"{os.path.splitext(output_file)[0]}_clusters.csv"
+    cluster_mapping(groups, total_rows).to_csv(path, index=False)
+    logger.info(f"Maparea rând -> cluster salvată în: {path}")
+    return path
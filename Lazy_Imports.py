@@ -0,0 +1,39 @@
+import importlib
+import types
+
+
+class LazyModule(types.ModuleType):
+    """Modul încărcat abia la primul acces la un atribut.
+
+    După încărcare, atributele folosite sunt copiate în modulul proxy, astfel că
+    accesările următoare (de ex. pd.isna în buclele de comparație) nu mai trec prin
+    __getattr__.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._lazy_module = None
+
+    def _load(self):
+        if self._lazy_module is None:
+            self._lazy_module = importlib.import_module(self.__name__)
+        return self._lazy_module
+
+    def __getattr__(self, attribute):
+        value = getattr(self._load(), attribute)
+        setattr(self, attribute, value)
+        return value
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    """Întoarce un modul care se importă abia când este folosit prima dată"""
+    return LazyModule(name)
+
+
+def tqdm(*args, **kwargs):
+    """Bara de progres tqdm, importată doar când o buclă chiar pornește"""
+    from tqdm import tqdm as progress_bar
+    return progress_bar(*args, **kwargs)
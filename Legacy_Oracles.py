@@ -0,0 +1,210 @@
+"""Copii înghețate ale implementărilor din baseline, folosite ca oracol de Regression_Harness.
+
+Funcțiile de aici nu se modifică odată cu pipeline-urile: orice schimbare de
+comportament din Procesing, Data_Procesing sau Process_Parquet trebuie să apară
+ca diferență față de ele. Sunt copiate fără progress bar și fără loguri.
+"""
+import re
+from collections import defaultdict
+from Lazy_Imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+Levenshtein = lazy_import('Levenshtein')
+fuzz = lazy_import('fuzzywuzzy.fuzz')
+
+
+# Procesing: Levenshtein pe primele 6 coloane și unificarea rând cu rând
+
+def procesing_similarity(str1, str2):
+    if pd.isna(str1) or pd.isna(str2):
+        return 0
+    str1, str2 = str(str1).lower().strip(), str(str2).lower().strip()
+    if str1 == str2:
+        return 1.0
+    if len(str1) == 0 or len(str2) == 0:
+        return 0
+    distance = Levenshtein.distance(str1, str2)
+    max_len = max(len(str1), len(str2))
+    return 1 - (distance / max_len)
+
+
+def procesing_merge_product_info(row1, row2):
+    merged = {}
+    for col in row1.index:
+        if pd.isna(row1[col]) and not pd.isna(row2[col]):
+            merged[col] = row2[col]
+        elif not pd.isna(row1[col]) and pd.isna(row2[col]):
+            merged[col] = row1[col]
+        else:
+            if isinstance(row1[col], str) and isinstance(row2[col], str):
+                if row1[col].lower().strip() == row2[col].lower().strip():
+                    merged[col] = row1[col]
+                else:
+                    combined = set(row1[col].split()) | set(row2[col].split())
+                    merged[col] = ' '.join(combined)
+            else:
+                merged[col] = row1[col] if not pd.isna(row1[col]) else row2[col]
+    return pd.Series(merged)
+
+
+def procesing_find_similar_products(df, threshold=0.85):
+    similar_groups = []
+    processed_indices = set()
+    comparison_df = df.iloc[:, :6].astype(str)
+    total_rows = len(df)
+
+    for i in range(total_rows):
+        if i in processed_indices:
+            continue
+        current_group = [i]
+        current_row = comparison_df.iloc[i]
+        for j in range(i + 1, total_rows):
+            if j in processed_indices:
+                continue
+            similarities = []
+            for col in comparison_df.columns:
+                similarities.append(procesing_similarity(current_row[col], comparison_df.iloc[j][col]))
+            if np.mean(similarities) > threshold:
+                current_group.append(j)
+        if len(current_group) > 1:
+            similar_groups.append(current_group)
+            processed_indices.update(current_group)
+        else:
+            processed_indices.add(i)
+    return similar_groups
+
+
+def procesing_deduplicate(df):
+    """deduplicate_products din baseline, fără citirea și scrierea fișierelor"""
+    deduplicated_products = []
+    processed_indices = set()
+    for group in procesing_find_similar_products(df):
+        merged_row = df.iloc[group[0]]
+        for idx in group[1:]:
+            merged_row = procesing_merge_product_info(merged_row, df.iloc[idx])
+        deduplicated_products.append(merged_row)
+        processed_indices.update(group)
+    for i in range(len(df)):
+        if i not in processed_indices:
+            deduplicated_products.append(df.iloc[i])
+    return pd.DataFrame(deduplicated_products)
+
+
+# Data_Procesing: titlu și nume, ambele peste prag
+
+def data_procesing_preprocess_text(text):
+    if pd.isna(text):
+        return ""
+    text = str(text).lower().strip()
+    return ''.join(c for c in text if c.isalnum() or c.isspace())
+
+
+def data_procesing_similarity(text1, text2):
+    if pd.isna(text1) or pd.isna(text2):
+        return 0
+    text1 = data_procesing_preprocess_text(text1)
+    text2 = data_procesing_preprocess_text(text2)
+    if text1 == text2:
+        return 1.0
+    if not text1 or not text2:
+        return 0
+    ratio = fuzz.ratio(text1, text2)
+    partial_ratio = fuzz.partial_ratio(text1, text2)
+    token_sort_ratio = fuzz.token_sort_ratio(text1, text2)
+    return (ratio * 0.4 + partial_ratio * 0.4 + token_sort_ratio * 0.2) / 100.0
+
+
+def data_procesing_find_duplicates(df):
+    similarity_groups = defaultdict(list)
+    processed_indices = set()
+    total_rows = len(df)
+
+    for i in range(total_rows):
+        if i in processed_indices:
+            continue
+        current_group = [i]
+        current_title = df.iloc[i]['product_title']
+        current_name = df.iloc[i]['product_name']
+        for j in range(i + 1, total_rows):
+            if j in processed_indices:
+                continue
+            title_similarity = data_procesing_similarity(current_title, df.iloc[j]['product_title'])
+            name_similarity = data_procesing_similarity(current_name, df.iloc[j]['product_name'])
+            if title_similarity > 0.85 and name_similarity > 0.85:
+                current_group.append(j)
+                processed_indices.add(j)
+        if len(current_group) > 1:
+            similarity_groups[f"group_{len(similarity_groups)}"] = current_group
+        processed_indices.add(i)
+    return similarity_groups
+
+
+# Process_Parquet: URL-uri similare în același root_domain
+
+def parquet_preprocess_url(url):
+    if pd.isna(url):
+        return ""
+    url = str(url).lower().strip()
+    url = re.sub(r'https?://', '', url)
+    url = re.sub(r'www\.', '', url)
+    url = url.split('?')[0]
+    return url.rstrip('/')
+
+
+def parquet_url_similarity(url1, url2):
+    if pd.isna(url1) or pd.isna(url2):
+        return 0
+    url1 = parquet_preprocess_url(url1)
+    url2 = parquet_preprocess_url(url2)
+    if url1 == url2:
+        return 1.0
+    if not url1 or not url2:
+        return 0
+    ratio = fuzz.ratio(url1, url2)
+    partial_ratio = fuzz.partial_ratio(url1, url2)
+    token_sort_ratio = fuzz.token_sort_ratio(url1, url2)
+    return (ratio * 0.4 + partial_ratio * 0.4 + token_sort_ratio * 0.2) / 100.0
+
+
+def parquet_merge_product_info(products_group):
+    if len(products_group) == 0:
+        return None
+    if len(products_group) == 1:
+        return products_group.iloc[0]
+    merged = {}
+    for col in products_group.columns:
+        values = products_group[col].dropna().unique()
+        if len(values) == 0:
+            merged[col] = None
+        elif len(values) == 1:
+            merged[col] = values[0]
+        elif all(isinstance(v, str) for v in values):
+            merged[col] = ' | '.join(sorted(set(values)))
+        else:
+            merged[col] = values[0]
+    return pd.Series(merged)
+
+
+def parquet_find_similar_products(df):
+    similarity_groups = defaultdict(list)
+    processed_indices = set()
+    total_rows = len(df)
+
+    for i in range(total_rows):
+        if i in processed_indices:
+            continue
+        current_group = [i]
+        current_domain = df.iloc[i]['root_domain']
+        current_url = df.iloc[i]['page_url']
+        for j in range(i + 1, total_rows):
+            if j in processed_indices:
+                continue
+            if current_domain == df.iloc[j]['root_domain']:
+                if parquet_url_similarity(current_url, df.iloc[j]['page_url']) > 0.85:
+                    current_group.append(j)
+                    processed_indices.add(j)
+        if len(current_group) > 1:
+            similarity_groups[f"group_{len(similarity_groups)}"] = current_group
+        processed_indices.add(i)
+    return similarity_groups
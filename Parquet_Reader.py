@@ -0,0 +1,90 @@
+import logging
+from Lazy_Imports import lazy_import
+
+pa = lazy_import('pyarrow')
+pc = lazy_import('pyarrow.compute')
+pq = lazy_import('pyarrow.parquet')
+
+logger = logging.getLogger(__name__)
+
+
+def column_index(metadata, column):
+    """Poziția coloanei în metadatele parquet (necesară pentru statisticile row group-urilor)"""
+    if metadata.num_row_groups == 0:
+        return None
+    row_group = metadata.row_group(0)
+    for i in range(row_group.num_columns):
+        if row_group.column(i).path_in_schema == column:
+            return i
+    raise ValueError(f"Coloana {column} nu există în fișierul parquet")
+
+
+def stats_may_contain(column_metadata, targets):
+    """False doar dacă statisticile min/max arată sigur că nicio valoare căutată nu e în row group"""
+    stats = column_metadata.statistics
+    if stats is None or not stats.has_min_max:
+        return True
+    low, high = stats.min, stats.max
+    if isinstance(low, bytes):
+        low, high = low.decode('utf-8', 'replace'), high.decode('utf-8', 'replace')
+    return any(low <= target <= high for target in targets)
+
+
+def dictionary_codes_mask(column, targets):
+    """Masca rândurilor cu valori din `targets`, comparând doar codurile întregi ale dicționarului.
+
+    Întoarce None dacă niciun dicționar nu conține valorile căutate, fără a mai
+    construi masca pe rânduri.
+    """
+    masks = []
+    found = False
+    for chunk in column.chunks:
+        target_codes = pc.indices_nonzero(pc.is_in(chunk.dictionary, value_set=targets))
+        found = found or len(target_codes) > 0
+        masks.append(pc.fill_null(pc.is_in(chunk.indices, value_set=pc.cast(target_codes, chunk.indices.type)), False))
+    return pa.chunked_array(masks, type=pa.bool_()) if found else None
+
+
+def read_domains(path, domains, columns=None, key='root_domain'):
+    """Citește doar rândurile cu root_domain în `domains`, sărind peste row group-urile inutile.
+
+    Row group-urile sunt eliminate întâi după statisticile min/max. Pentru cele
+    rămase se citește o singură dată coloana cheie, codificată ca dicționar: dacă
+    dicționarul nu conține domeniile, row group-ul e sărit; altfel celelalte coloane
+    se citesc doar pentru el, iar rândurile sunt filtrate după codurile întregi.
+    root_domain rămâne categorical în pandas.
+    """
+    try:
+        targets = pa.array(sorted(set(domains)), type=pa.string())
+        parquet_file = pq.ParquetFile(path, read_dictionary=[key])
+        metadata = parquet_file.metadata
+        index = column_index(metadata, key)
+        if columns is None:
+            columns = parquet_file.schema_arrow.names
+        elif key not in columns:
+            columns = [key] + list(columns)
+        other_columns = [col for col in columns if col != key]
+
+        tables = []
+        skipped_by_stats = skipped_by_dictionary = 0
+        for rg in range(metadata.num_row_groups):
+            if not stats_may_contain(metadata.row_group(rg).column(index), targets.to_pylist()):
+                skipped_by_stats += 1
+                continue
+            key_column = parquet_file.read_row_group(rg, columns=[key]).column(key)
+            mask = dictionary_codes_mask(key_column, targets)
+            if mask is None:
+                skipped_by_dictionary += 1
+                continue
+            table = parquet_file.read_row_group(rg, columns=other_columns)
+            table = table.append_column(key, key_column).select(columns)
+            tables.append(table.filter(mask))
+        logger.info(f"Row group-uri: {metadata.num_row_groups}, citite: {len(tables)}, "
+                    f"sărite după statistici: {skipped_by_stats}, după dicționar: {skipped_by_dictionary}")
+
+        table = pa.concat_tables(tables) if tables else parquet_file.read_row_groups([], columns=columns)
+        logger.info(f"Rânduri păstrate pentru {len(targets)} domenii: {table.num_rows}")
+        return table.to_pandas()
+    except Exception as e:
+        logger.error(f"Eroare la citirea filtrată a fișierului parquet: {str(e)}")
+        raise
@@ -1,12 +1,12 @@
-import pandas as pd 
-import numpy as np 
-import pyarrow.parquet as pq
-from fuzzywuzzy import fuzz 
 from collections import defaultdict
 import logging
-from tqdm import tqdm
-import warnings
+import argparse
+from Lazy_Imports import lazy_import, tqdm
 import os
+
+# Dependențele grele se încarcă doar la prima folosire
+pd = lazy_import('pandas')
+fuzz = lazy_import('fuzzywuzzy.fuzz')
 #This is the second method I used to analyze this file, it really takes too long to process and more precisely about two hours 
 # Configurare logging
 logging.basicConfig(
@@ -204,6 +204,7 @@ def process_data():
         raise
 
 if __name__ == "__main__":
+    argparse.ArgumentParser(description="Deduplicare produse după product_title și product_name").parse_args()
     try:
         logger.info("Începe procesarea fișierului Excel...")
         result_df = process_data()
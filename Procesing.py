@@ -1,8 +1,15 @@
-import numpy as np 
-import pandas as pd
-import Levenshtein
 import logging
-from tqdm import tqdm
+import argparse
+from collections import defaultdict
+from Lazy_Imports import lazy_import, tqdm
+from Tokenize import build_token_matrices
+from Exact_Duplicates import collapse_exact_duplicates, expand_groups, compute_row_hashes, write_cluster_mapping
+from Score_Cache import ScoreCache
+
+# Dependențele grele se încarcă doar la prima folosire
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+Levenshtein = lazy_import('Levenshtein')
 
 # Configurăm logging pentru debug
 logging.basicConfig(level=logging.DEBUG, 
@@ -69,7 +76,45 @@ def merge_product_info(row1, row2):
         logger.error("Eroare la unificarea rândurilor: %s", str(e))
         raise
 
-def find_similar_products(df, threshold=0.85):
+def merge_product_group(column_values, group, token_matrices):
+    """Unește un grup întreg de produse similare folosind tokenii întregi precalculați.
+
+    column_values conține valorile fiecărei coloane ca listă (col -> df[col].tolist()).
+    Rezultatul este același cu aplicarea merge_product_info rând cu rând, în ordinea
+    grupului; doar ordinea tokenilor reuniți este fixă (ordinea din vocabular).
+    """
+    try:
+        merged = {}
+        for col, column in column_values.items():
+            values = [column[idx] for idx in group]
+            matrix = token_matrices.get(col)
+            current, current_row = values[0], group[0]
+            # Tokenii reuniți până acum; None cât timp textul curent vine dintr-un singur rând
+            union = None
+            for idx, value in zip(group[1:], values[1:]):
+                if pd.isna(current):
+                    current, current_row, union = value, idx, None
+                elif pd.isna(value):
+                    continue
+                elif matrix is not None and isinstance(current, str) and isinstance(value, str):
+                    # Textele identice (ignorând majusculele) nu adaugă tokeni
+                    if current.lower().strip() == value.lower().strip():
+                        continue
+                    if union is None:
+                        union = matrix.row(current_row)
+                    union = np.union1d(union, matrix.row(idx))
+                    current = matrix.vocabulary.decode(union)
+                # Pentru valori non-text, păstrăm prima valoare non-nulă
+            merged[col] = current
+        return pd.Series(merged)
+    except Exception as e:
+        logger.error("Eroare la unificarea grupului: %s", str(e))
+        raise
+
+# Numele comparatorului folosit ca parte din cheia cache-ului de scoruri
+CACHE_COMPARATOR = 'levenshtein_mean_6'
+
+def find_similar_products(df, threshold=0.85, cache=None):
     """Găsește produse similare în DataFrame"""
     logger.info("Începe căutarea produselor similare cu threshold %s", threshold)
     similar_groups = []
@@ -78,6 +123,8 @@ def find_similar_products(df, threshold=0.85):
     # Convertim primele 6 coloane la string pentru comparație
     comparison_df = df.iloc[:, :6].astype(str)
     total_rows = len(df)
+    if cache is not None:
+        row_hashes = compute_row_hashes(df, df.columns[:6])
     
     for i in tqdm(range(total_rows), desc="Procesare produse"):
         if i in processed_indices:
@@ -91,14 +138,20 @@ def find_similar_products(df, threshold=0.85):
             if j in processed_indices:
                 continue
                 
-            # Calculăm similaritatea pentru fiecare coloană
-            similarities = []
-            for col in comparison_df.columns:
-                sim = calculate_similarity(current_row[col], comparison_df.iloc[j][col])
-                similarities.append(sim)
+            def compute_similarity():
+                # Calculăm similaritatea pentru fiecare coloană
+                similarities = []
+                for col in comparison_df.columns:
+                    sim = calculate_similarity(current_row[col], comparison_df.iloc[j][col])
+                    similarities.append(sim)
+                
+                # Media similarităților
+                return np.mean(similarities)
             
-            # Media similarităților
-            avg_similarity = np.mean(similarities)
+            if cache is not None:
+                avg_similarity = cache.get_or_compute(row_hashes[i], row_hashes[j], CACHE_COMPARATOR, compute_similarity)
+            else:
+                avg_similarity = compute_similarity()
             
             if avg_similarity > threshold:
                 current_group.append(j)
@@ -113,28 +166,193 @@ def find_similar_products(df, threshold=0.85):
     
     return similar_groups
 
-def deduplicate_products(input_file, output_file):
-    """Funcția principală pentru deduplicarea produselor"""
+# Chei compuse pentru modul sorted-neighbourhood; se folosesc doar cele existente în date
+DEFAULT_SORT_KEYS = [
+    ('root_domain', 'product_title'),
+    ('product_name', 'product_title'),
+    ('product_title', 'product_name'),
+]
+
+def normalize_sort_value(value):
+    """Normalizează o valoare folosită în cheia de sortare"""
+    if pd.isna(value):
+        return ""
+    value = str(value).lower().strip()
+    for prefix in ('https://', 'http://', 'www.'):
+        if value.startswith(prefix):
+            value = value[len(prefix):]
+    return value
+
+def resolve_sort_keys(df, sort_keys=None):
+    """Păstrează doar cheile de sortare ale căror coloane există în DataFrame"""
+    if sort_keys is None:
+        sort_keys = DEFAULT_SORT_KEYS
+    valid_keys = [tuple(key) for key in sort_keys if all(col in df.columns for col in key)]
+    if not valid_keys:
+        # Nu avem coloanele cunoscute, sortăm după primele coloane comparate
+        columns = df.columns[:6].tolist()
+        valid_keys = [tuple(columns[:2]), tuple(columns[1:3])]
+        valid_keys = [key for key in valid_keys if key]
+    return valid_keys
+
+def build_sort_order(df, sort_key):
+    """Întoarce pozițiile rândurilor sortate după cheia compusă normalizată"""
+    keys = pd.DataFrame({
+        f"k{n}": df[col].map(normalize_sort_value).to_numpy()
+        for n, col in enumerate(sort_key)
+    })
+    return keys.sort_values(by=keys.columns.tolist(), kind='mergesort').index.to_numpy()
+
+def average_row_similarity(row1, row2):
+    """Media similarităților Levenshtein pe coloanele comparate"""
+    similarities = [calculate_similarity(a, b) for a, b in zip(row1, row2)]
+    return sum(similarities) / len(similarities)
+
+def group_pairs(pairs, total_rows):
+    """Transformă perechile de duplicate în grupuri (componente conexe, union-find)"""
+    parent = list(range(total_rows))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = defaultdict(list)
+    for i in range(total_rows):
+        groups[find(i)].append(i)
+    return [group for _, group in sorted(groups.items()) if len(group) > 1]
+
+def find_similar_pairs_windowed(df, threshold=0.85, window=10, sort_keys=None, cache=None):
+    """Găsește perechi similare comparând fiecare rând doar cu următoarele `window`
+    rânduri în fiecare ordine de sortare (sorted-neighbourhood).
+
+    Costul este O(n * window * treceri) în loc de O(n^2).
+    Întoarce perechile găsite și numărul de comparații efectuate.
+    """
+    sort_keys = resolve_sort_keys(df, sort_keys)
+    logger.info("Mod sorted-neighbourhood: window=%s, chei=%s", window, sort_keys)
+    
+    comparison_rows = list(df.iloc[:, :6].astype(str).itertuples(index=False, name=None))
+    if cache is not None:
+        row_hashes = compute_row_hashes(df, df.columns[:6])
+    compared = set()
+    similar_pairs = set()
+    
+    for sort_key in sort_keys:
+        order = build_sort_order(df, sort_key)
+        for pos in tqdm(range(len(order)), desc=f"Fereastră {'+'.join(sort_key)}"):
+            i = order[pos]
+            for j in order[pos + 1:pos + 1 + window]:
+                pair = (i, j) if i < j else (j, i)
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                
+                if cache is not None:
+                    avg_similarity = cache.get_or_compute(
+                        row_hashes[i], row_hashes[j], CACHE_COMPARATOR,
+                        lambda: average_row_similarity(comparison_rows[i], comparison_rows[j])
+                    )
+                else:
+                    avg_similarity = average_row_similarity(comparison_rows[i], comparison_rows[j])
+                if avg_similarity > threshold:
+                    similar_pairs.add(pair)
+                    logger.debug(f"Produs similar găsit: {pair[0]} - {pair[1]} (similaritate: {avg_similarity:.2f})")
+    
+    logger.info("Comparații efectuate: %d, perechi similare: %d", len(compared), len(similar_pairs))
+    return similar_pairs, len(compared)
+
+def find_similar_products_windowed(df, threshold=0.85, window=10, sort_keys=None, cache=None):
+    """Varianta sorted-neighbourhood a find_similar_products.
+
+    Perechile găsite în toate ordinile de sortare sunt reunite, iar grupurile
+    sunt componentele conexe ale acestor perechi.
+    """
+    similar_pairs, _ = find_similar_pairs_windowed(df, threshold, window, sort_keys, cache)
+    return group_pairs(similar_pairs, len(df))
+
+def evaluate_window_recall(df, window=10, sort_keys=None, threshold=0.85, sample_size=1000, random_state=0):
+    """Compară modul cu fereastră cu modul exhaustiv pe un eșantion de rânduri.
+
+    Recall-ul este procentul perechilor găsite exhaustiv care ajung în același
+    grup și în modul cu fereastră. Pe un eșantion densitatea e mai mică decât pe
+    tot fișierul, deci recall-ul obținut este o estimare optimistă.
+    """
+    sample = df.sample(n=min(sample_size, len(df)), random_state=random_state).reset_index(drop=True)
+    total_rows = len(sample)
+    
+    comparison_rows = list(sample.iloc[:, :6].astype(str).itertuples(index=False, name=None))
+    exhaustive_pairs = set()
+    for i in tqdm(range(total_rows), desc="Eșantion exhaustiv"):
+        for j in range(i + 1, total_rows):
+            if average_row_similarity(comparison_rows[i], comparison_rows[j]) > threshold:
+                exhaustive_pairs.add((i, j))
+    
+    similar_pairs, comparisons = find_similar_pairs_windowed(sample, threshold, window, sort_keys)
+    group_of = {}
+    for group_id, group in enumerate(group_pairs(similar_pairs, total_rows)):
+        for idx in group:
+            group_of[idx] = group_id
+    found = sum(1 for i, j in exhaustive_pairs if i in group_of and group_of.get(i) == group_of.get(j))
+    
+    report = {
+        'sample_rows': total_rows,
+        'window': window,
+        'exhaustive_comparisons': total_rows * (total_rows - 1) // 2,
+        'windowed_comparisons': comparisons,
+        'exhaustive_pairs': len(exhaustive_pairs),
+        'found_pairs': found,
+        'recall': found / len(exhaustive_pairs) if exhaustive_pairs else 1.0,
+    }
+    logger.info("Recall sorted-neighbourhood pe eșantion: %s", report)
+    return report
+
+def deduplicate_products(input_file, output_file, window=None, sort_keys=None, threshold=0.85, cache_path=None):
+    """Funcția principală pentru deduplicarea produselor.
+
+    Cu `cache_path`, scorurile perechilor sunt păstrate între rulări, astfel că
+    o rulare cu alt threshold calculează doar perechile noi.
+    """
     logger.info("Începe procesul de deduplicare")
+    cache = ScoreCache(cache_path) if cache_path else None
     try:
         # Încărcăm datele
         df = load_data(input_file)
         initial_count = len(df)
         logger.info("Număr inițial de produse: %s", initial_count)
         
+        # Eliminăm întâi duplicatele exacte pe coloanele comparate
+        unique_df, representatives, exact_groups = collapse_exact_duplicates(df, df.columns[:6])
+        
         # Găsim grupurile de produse similare
-        similar_groups = find_similar_products(df)
+        if window:
+            similar_groups = find_similar_products_windowed(
+                unique_df, threshold=threshold, window=window, sort_keys=sort_keys, cache=cache
+            )
+        else:
+            similar_groups = find_similar_products(unique_df, threshold=threshold, cache=cache)
+        similar_groups = expand_groups(similar_groups, representatives, exact_groups)
         logger.info("Număr de grupuri similare găsite: %s", len(similar_groups))
         
         # Procesăm grupurile și creăm noul DataFrame
         deduplicated_products = []
         processed_indices = set()
         
+        # Tokenizăm o singură dată coloanele text, doar pentru rândurile din grupuri
+        text_columns = [col for col in df.columns if pd.api.types.is_string_dtype(df[col].dtype)]
+        grouped_rows = [idx for group in similar_groups for idx in group]
+        token_matrices = build_token_matrices(df, text_columns, grouped_rows)
+        column_values = {col: df[col].tolist() for col in df.columns}
+        
         # Procesăm grupurile de produse similare
         for group in similar_groups:
-            merged_row = df.iloc[group[0]]
-            for idx in group[1:]:
-                merged_row = merge_product_info(merged_row, df.iloc[idx])
+            merged_row = merge_product_group(column_values, group, token_matrices)
             deduplicated_products.append(merged_row)
             processed_indices.update(group)
         
@@ -148,6 +366,7 @@ def deduplicate_products(input_file, output_file):
         
         # Salvăm rezultatele
         result_df.to_excel(output_file, index=False)
+        write_cluster_mapping(similar_groups, initial_count, output_file)
         final_count = len(result_df)
         
         # Afișăm statistici
@@ -156,17 +375,39 @@ def deduplicate_products(input_file, output_file):
         logger.info("- Produse inițiale: %d", initial_count)
         logger.info("- Produse după deduplicare: %d", final_count)
         logger.info("- Duplicate găsite și unificate: %d", initial_count - final_count)
+        if cache is not None:
+            logger.info("- Cache scoruri: %s", cache.report())
         
         return result_df
     
     except Exception as e:
         logger.error("Eroare în procesul de deduplicare: %s", str(e))
         raise
+    finally:
+        if cache is not None:
+            cache.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicare produse cu Levenshtein pe primele 6 coloane")
+    parser.add_argument('--input', default='veridion_product_deduplication_challenge.xlsx')
+    parser.add_argument('--output', default='veridion_product_deduplication_challenge_deduplicated.xlsx')
+    parser.add_argument('--threshold', type=float, default=0.85)
+    parser.add_argument('--window', type=int, default=None, help="activează modul sorted-neighbourhood")
+    parser.add_argument('--sort-keys', nargs='+', default=None,
+                        help="chei de sortare pentru fereastră, coloane separate prin virgulă (ex. root_domain,product_title)")
+    parser.add_argument('--recall-sample', type=int, default=None,
+                        help="doar raportul de recall al ferestrei pe un eșantion de N rânduri, fără deduplicare")
+    parser.add_argument('--cache', default=None, help="fișier SQLite pentru cache-ul de scoruri")
+    args = parser.parse_args()
+    sort_keys = [tuple(key.split(',')) for key in args.sort_keys] if args.sort_keys else None
     try:
-        input_file = 'veridion_product_deduplication_challenge.xlsx'
-        output_file = 'veridion_product_deduplication_challenge_deduplicated.xlsx'
-        deduplicate_products(input_file, output_file)
+        if args.recall_sample:
+            report = evaluate_window_recall(load_data(args.input), window=args.window or 10, sort_keys=sort_keys,
+                                            threshold=args.threshold, sample_size=args.recall_sample)
+            for name, value in report.items():
+                print(f"{name}: {value}")
+        else:
+            deduplicate_products(args.input, args.output, window=args.window, sort_keys=sort_keys,
+                                 threshold=args.threshold, cache_path=args.cache)
     except Exception as e:
-        logger.error("Eroare la rularea programului: %s", str(e))
\ No newline at end of file
+        logger.error("Eroare la rularea programului: %s", str(e))
@@ -1,5 +1,6 @@
-import pandas as pd 
-import numpy as np 
+from Lazy_Imports import lazy_import
+
+pd = lazy_import('pandas')
 
 
 
@@ -1,15 +1,17 @@
-import pandas as pd
-import numpy as np
-import pyarrow.parquet as pq
-from fuzzywuzzy import fuzz
 from collections import defaultdict
 import re
 import logging
-from tqdm import tqdm
-import warnings
-from pathlib import Path
+import argparse
+from Lazy_Imports import lazy_import, tqdm
+from Parquet_Reader import read_domains
 import os
 
+# Dependențele grele se încarcă doar la prima folosire
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+pq = lazy_import('pyarrow.parquet')
+fuzz = lazy_import('fuzzywuzzy.fuzz')
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -90,6 +92,52 @@ def merge_product_info(products_group):
         logger.error(f"Eroare la unificarea produselor: {str(e)}")
         raise
 
+def merge_similarity_groups(df, similarity_groups):
+    """Unifică toate grupurile deodată, cu agregări grupate pe id-ul de cluster.
+
+    Rezultatul este identic cu aplicarea merge_product_info pe fiecare grup: valorile
+    unice non-nule în ordinea apariției, o singură valoare păstrată ca atare, mai
+    multe texte unite sortat cu ' | ', iar pentru non-text prima valoare.
+    Coloanele sunt procesate pe rând, deci memoria depinde doar de rândurile grupate.
+    """
+    try:
+        groups = list(similarity_groups.values())
+        if not groups:
+            return pd.DataFrame(columns=df.columns)
+        
+        positions = np.concatenate([np.asarray(group, dtype=np.int64) for group in groups])
+        cluster_ids = np.repeat(np.arange(len(groups)), [len(group) for group in groups])
+        
+        merged = {}
+        for col in df.columns:
+            values = pd.DataFrame({
+                'cluster': cluster_ids,
+                'value': df[col].to_numpy(dtype=object)[positions],
+            })
+            # Echivalentul dropna().unique() pe fiecare grup
+            values = values[values['value'].notna()].drop_duplicates()
+            
+            by_cluster = values.groupby('cluster', sort=True)
+            result = pd.Series([None] * len(groups), dtype=object)
+            first_values = by_cluster['value'].first()
+            result[first_values.index] = first_values.to_numpy()
+            
+            # Grupurile cu mai multe valori, toate text, sunt unite sortat
+            counts = by_cluster.size()
+            is_text = values['value'].map(lambda v: isinstance(v, str))
+            all_text = is_text.groupby(values['cluster']).all()
+            text_clusters = counts.index[(counts > 1) & all_text.reindex(counts.index).to_numpy()]
+            if len(text_clusters):
+                texts = values[values['cluster'].isin(text_clusters)].sort_values(['cluster', 'value'])
+                joined = texts.groupby('cluster')['value'].agg(' | '.join)
+                result[joined.index] = joined.to_numpy()
+            
+            merged[col] = result.to_numpy()
+        return pd.DataFrame(merged, columns=df.columns)
+    except Exception as e:
+        logger.error(f"Eroare la unificarea grupurilor: {str(e)}")
+        raise
+
 def find_similar_products(df):
     """Identifică produse similare bazate pe root_domain și page_url"""
     logger.info("Începe identificarea produselor similare...")
@@ -99,23 +147,28 @@ def find_similar_products(df):
         processed_indices = set()
         total_rows = len(df)
         
+        # Domeniile sunt comparate prin codurile întregi; valorile lipsă primesc toate
+        # codul -1 și sunt comparate între ele, ca None == None în citirea ca object
+        domain_codes = pd.factorize(df['root_domain'])[0]
+        urls = df['page_url'].to_numpy(dtype=object)
+        
         for i in tqdm(range(total_rows), desc="Analiză similaritate"):
             if i in processed_indices:
                 continue
                 
             current_group = [i]
-            current_domain = df.iloc[i]['root_domain']
-            current_url = df.iloc[i]['page_url']
+            current_domain = domain_codes[i]
+            current_url = urls[i]
             
             for j in range(i + 1, total_rows):
                 if j in processed_indices:
                     continue
                 
               
-                if current_domain == df.iloc[j]['root_domain']:
+                if current_domain == domain_codes[j]:
                     url_similarity = calculate_url_similarity(
                         current_url,
-                        df.iloc[j]['page_url']
+                        urls[j]
                     )
                     
                     if url_similarity > 0.85:  # Prag de similaritate
@@ -132,18 +185,50 @@ def find_similar_products(df):
         logger.error(f"Eroare la identificarea produselor similare: {str(e)}")
         raise
 
-def process_parquet_file():
-    """Procesează fișierul Parquet și salvează rezultatele în Excel"""
+def find_similar_in_block(positions, urls, threshold=0.85):
+    """Același algoritm ca find_similar_products, restrâns la rândurile unui singur root_domain.
+
+    positions sunt pozițiile globale ale rândurilor (crescătoare), iar urls valorile page_url.
+    Întoarce grupurile găsite, ca liste de poziții globale.
+    """
+    groups = []
+    processed = set()
+    for a in range(len(positions)):
+        if a in processed:
+            continue
+        
+        current_group = [a]
+        for b in range(a + 1, len(positions)):
+            if b in processed:
+                continue
+            if calculate_url_similarity(urls[a], urls[b]) > threshold:
+                current_group.append(b)
+                processed.add(b)
+        
+        if len(current_group) > 1:
+            groups.append([positions[k] for k in current_group])
+        processed.add(a)
+    return groups
+
+def process_parquet_file(input_file='veridion_product_deduplication_challenge.snappy.parquet',
+                         find_groups=find_similar_products, domains=None):
+    """Procesează fișierul Parquet și salvează rezultatele în Excel.
+
+    Cu `domains`, se citesc doar row group-urile care pot conține acele domenii.
+    """
     try:
-        input_file = 'veridion_product_deduplication_challenge.snappy.parquet'
         logger.info(f"Începe procesarea fișierului: {input_file}")
      
         if not os.path.exists(input_file):
             raise FileNotFoundError(f"Fișierul {input_file} nu există în directorul curent!")
         
         logger.info("Citire fișier Parquet...")
-        table = pq.read_table(input_file)
-        df = table.to_pandas()
+        if domains:
+            df = read_domains(input_file, domains)
+        else:
+            # root_domain rămâne codificat ca dicționar (categorical)
+            table = pq.read_table(input_file, read_dictionary=['root_domain'])
+            df = table.to_pandas()
         logger.info(f"Date încărcate cu succes. Dimensiune inițială: {df.shape}")
         logger.info(f"Coloane disponibile: {df.columns.tolist()}")
         
@@ -155,31 +240,25 @@ def process_parquet_file():
         
       
         logger.info("Începe identificarea produselor similare...")
-        similarity_groups = find_similar_products(df)
+        similarity_groups = find_groups(df)
         logger.info(f"Grupuri de similaritate găsite: {len(similarity_groups)}")
         
  
         logger.info("Procesare grupurile de produse similare...")
-        result_products = []
+        merged_products = merge_similarity_groups(df, similarity_groups)
         processed_indices = set()
-        
-        # Procesăm grupurile de produse similare
-        for group_key, group_indices in similarity_groups.items():
-            logger.debug(f"Procesare grup {group_key} cu {len(group_indices)} produse")
-            group_df = df.iloc[group_indices]
-            merged_product = merge_product_info(group_df)
-            if merged_product is not None:
-                result_products.append(merged_product)
+        for group_indices in similarity_groups.values():
             processed_indices.update(group_indices)
         
         # Adăugăm produsele unice
         logger.info("Adăugare produse unice...")
         unique_products = df[~df.index.isin(processed_indices)]
-        result_products.extend(unique_products.to_dict('records'))
         
         # Creăm DataFrame-ul final și salvăm în Excel  :))
         logger.info("Creare și salvare rezultat final...")
-        result_df = pd.DataFrame(result_products)
+        result_df = pd.concat(
+            [merged_products, unique_products.astype(object)], ignore_index=True
+        ).infer_objects()
         result_df.to_excel('Result.xlsx', index=False)
         
         # Afișăm statistici  Asta pentru final dar nu inteleg de ce dureaza cateva ore sa se proceseze vad co o face 10 comparari pe secunda sau ceva de genu asta mis e pare foarte incet
@@ -197,9 +276,13 @@ def process_parquet_file():
         raise
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicare produse după root_domain și page_url")
+    parser.add_argument('--input', default='veridion_product_deduplication_challenge.snappy.parquet')
+    parser.add_argument('--domains', nargs='+', default=None, help="procesează doar aceste root_domain")
+    args = parser.parse_args()
     try:
         logger.info("Începe procesarea fișierului Parquet...")
-        result_df = process_parquet_file()
+        result_df = process_parquet_file(args.input, domains=args.domains)
         logger.info("Procesare finalizată cu succes!")
     except FileNotFoundError as e:
         logger.error(f"Fișierul nu a fost găsit: {str(e)}")
@@ -0,0 +1,444 @@
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from Lazy_Imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Fixture-ul fix pe care se măsoară timpii; schimbarea lui invalidează baseline-urile salvate
+FIXTURE_PRODUCTS = 60
+FIXTURE_SEED = 0
+
+# Bugetul de timp (secunde) al fiecărui motor pe fixture-ul fix
+BUDGETS = {
+    'text/exhaustive': 10.0,
+    'text/exact_collapse': 10.0,
+    'text/score_cache': 10.0,
+    'row/exhaustive': 20.0,
+    'row/exact_collapse': 20.0,
+    'row/windowed': 10.0,
+    'row/merge_tokens': 2.0,
+    'row/deduplicate_products': 30.0,
+    'url/exhaustive': 5.0,
+    'url/distributed': 10.0,
+    'url/scheduled': 10.0,
+    'url/merge_vectorized': 2.0,
+    'export/xlsx': 60.0,
+    'export/csv': 10.0,
+}
+
+# Scăderea maximă de throughput acceptată față de un baseline salvat; timpii pe
+# fixture-ul mic variază mult între rulări, deci prindem doar regresiile mari
+DEFAULT_TOLERANCE = 0.5
+
+# Exportul se verifică peste limita Excel de 65.530 hyperlink-uri pe foaie
+EXPORT_ROWS = 70_000
+
+# Modul cu fereastră nu e exhaustiv, deci i se cere doar un recall minim
+WINDOW = 10
+MIN_WINDOW_RECALL = 0.9
+
+# Variantele puse împreună pe unele produse: grupuri cu texte diferite, variante doar
+# de majuscule și valori non-text în aceeași coloană, unde unificarea e cea mai fragilă
+HARD_VARIANTS = ['typo', 'case', 'brand', 'brand_code']
+
+WORDS = [
+    'classic', 'leather', 'wallet', 'steel', 'watch', 'cotton', 'shirt', 'garden', 'chair', 'wooden',
+    'table', 'ceramic', 'vase', 'running', 'shoes', 'wireless', 'speaker', 'glass', 'bottle', 'winter',
+    'jacket', 'kitchen', 'knife', 'travel', 'backpack', 'silver', 'ring', 'desk', 'lamp', 'yoga',
+    'mat', 'coffee', 'grinder', 'baby', 'stroller', 'camping', 'tent', 'phone', 'case', 'pillow',
+]
+
+
+def random_product(rng, n):
+    """Un produs de bază; titlurile și URL-urile diferă destul încât să nu se potrivească între ele"""
+    domain = f"shop{n % 7}.com" if n % 11 else None
+    title = ' '.join(rng.sample(WORDS, 4)) + f" {rng.choice(string.ascii_uppercase)}{n:03d}"
+    slug = ''.join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(16))
+    return {
+        'root_domain': domain,
+        'page_url': f"https://www.{domain or 'unknown.net'}/products/{slug}",
+        'product_title': title,
+        'product_name': title.title(),
+        'product_summary': f"{title} made by brand {n % 5}, reference {slug[:6]}",
+        'brand': f"brand {n % 5}",
+    }
+
+
+def make_variant(rng, product, kind):
+    """O variantă a produsului, așa cum apare în datele reale pe alt rând"""
+    variant = dict(product)
+    if kind == 'exact':
+        return variant
+    if kind == 'case':
+        variant['product_title'] = f"  {product['product_title'].upper()} "
+        variant['product_name'] = product['product_name'].lower()
+    elif kind == 'url':
+        variant['page_url'] = product['page_url'].replace('https://www.', 'http://') + '/?ref=home'
+    elif kind == 'typo':
+        title = list(product['product_title'])
+        position = rng.randrange(len(title) - 5)
+        title[position], title[position + 1] = title[position + 1], title[position]
+        variant['product_title'] = ''.join(title)
+    elif kind == 'missing':
+        variant['product_summary'] = None
+    elif kind == 'null_title':
+        variant['product_title'] = None
+    elif kind == 'null_name':
+        variant['product_name'] = None
+    elif kind == 'null_both':
+        variant['product_title'] = variant['product_name'] = None
+    elif kind == 'brand':
+        variant['brand'] = f"{product['brand']} inc"
+    elif kind == 'brand_code':
+        # Valoare non-text într-o coloană text, ca în exporturile reale
+        variant['brand'] = int(product['brand'].split()[-1])
+    return variant
+
+
+def generate_fixture(n_products=FIXTURE_PRODUCTS, seed=FIXTURE_SEED):
+    """Produse generate cu duplicate exacte, variante aproape identice, chei și domenii lipsă"""
+    rng = random.Random(seed)
+    rows = []
+    for n in range(n_products):
+        product = random_product(rng, n)
+        rows.append(product)
+        if n % 10 == 9:
+            kinds = HARD_VARIANTS
+        else:
+            kinds = [rng.choice(['exact', 'case', 'url', 'typo', 'missing', 'null_title', 'null_name', 'null_both'])
+                     for _ in range(rng.choice([0, 0, 1, 2, 3]))]
+        for kind in kinds:
+            variant = make_variant(rng, product, kind)
+            rows.append(variant)
+            if kind.startswith('null'):
+                # Rândurile identice cu chei lipsă nu sunt duplicate pentru Data_Procesing și analyze
+                rows.append(dict(variant))
+    rng.shuffle(rows)
+    return pd.DataFrame(rows)
+
+
+def canonical_groups(groups):
+    """Grupurile ca mulțime de mulțimi, independent de ordine și de numele grupurilor"""
+    if isinstance(groups, dict):
+        groups = groups.values()
+    return {frozenset(int(idx) for idx in group) for group in groups if len(group) > 1}
+
+
+def diff_groups(expected, actual):
+    expected, actual = canonical_groups(expected), canonical_groups(actual)
+    missing = sorted(sorted(group) for group in expected - actual)
+    extra = sorted(sorted(group) for group in actual - expected)
+    return {'groups': len(actual), 'expected_groups': len(expected), 'missing': missing, 'extra': extra}
+
+
+def same_pairs_recall(expected, actual):
+    """Procentul perechilor din grupurile oracolului care ajung în același grup și la motor"""
+    group_of = {}
+    for group_id, group in enumerate(canonical_groups(actual)):
+        for idx in group:
+            group_of[idx] = group_id
+    total = found = 0
+    for group in canonical_groups(expected):
+        members = sorted(group)
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                total += 1
+                found += members[a] in group_of and group_of[members[a]] == group_of.get(members[b])
+    return found / total if total else 1.0
+
+
+def token_cell(value):
+    """Textele unite pe tokeni se compară ca liste sortate de tokeni, cu majusculele păstrate.
+
+    merge_product_info unește tokenii dintr-un set, deci ordinea lor nu e fixă.
+    """
+    if isinstance(value, str):
+        return sorted(value.split())
+    return None if pd.isna(value) else value
+
+
+def diff_rows(expected, actual, cell=lambda value: None if pd.isna(value) else value):
+    """Rândurile unificate care diferă (poziție, coloană) între oracol și motor"""
+    if len(expected) != len(actual):
+        return [('rows', len(expected), len(actual))]
+    mismatches = []
+    for position in range(len(expected)):
+        for col in expected.columns:
+            if cell(expected.iloc[position][col]) != cell(actual.iloc[position][col]):
+                mismatches.append((position, col))
+    return mismatches
+
+
+def timed(repeat, function, *args, **kwargs):
+    """Rezultatul funcției și cel mai bun timp din `repeat` rulări"""
+    best = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = function(*args, **kwargs)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def collapsed(find_groups, df, columns, **options):
+    """Rulează motorul pe reprezentanții duplicatelor exacte și extinde grupurile înapoi.
+
+    options sunt cele folosite de pipeline la collapse_exact_duplicates.
+    """
+    from Exact_Duplicates import collapse_exact_duplicates, expand_groups
+
+    unique_df, representatives, exact_groups = collapse_exact_duplicates(df, columns, **options)
+    groups = find_groups(unique_df)
+    if isinstance(groups, dict):
+        groups = groups.values()
+    return expand_groups(groups, representatives, exact_groups)
+
+
+def check_text_engines(df, repeat=3):
+    """Data_Procesing: motoarele față de find_duplicates_new din baseline (Legacy_Oracles)"""
+    from Data_Procesing import find_duplicates_new
+    from Score_Cache import ScoreCache
+    from Legacy_Oracles import data_procesing_find_duplicates
+
+    oracle = data_procesing_find_duplicates(df)
+    groups, seconds = timed(repeat, find_duplicates_new, df)
+    results = [{'check': 'text', 'engine': 'exhaustive', 'seconds': seconds, 'diff': diff_groups(oracle, groups)}]
+
+    groups, seconds = timed(repeat, collapsed, find_duplicates_new, df, ['product_title', 'product_name'],
+                            collapse_nulls=False)
+    results.append({'check': 'text', 'engine': 'exact_collapse', 'seconds': seconds, 'diff': diff_groups(oracle, groups)})
+
+    with ScoreCache() as cache:
+        # A doua rulare citește toate scorurile din cache
+        find_duplicates_new(df, cache=cache)
+        groups, seconds = timed(repeat, find_duplicates_new, df, cache=cache)
+    results.append({'check': 'text', 'engine': 'score_cache', 'seconds': seconds, 'diff': diff_groups(oracle, groups)})
+    return results
+
+
+def check_row_engines(df, repeat=3):
+    """Procesing: motoarele și deduplicate_products față de pipeline-ul din baseline (Legacy_Oracles)"""
+    from Procesing import (find_similar_products, find_similar_products_windowed,
+                           merge_product_group, deduplicate_products)
+    from Tokenize import build_token_matrices
+    from Legacy_Oracles import procesing_find_similar_products, procesing_merge_product_info, procesing_deduplicate
+
+    oracle = procesing_find_similar_products(df)
+    groups, seconds = timed(repeat, find_similar_products, df)
+    results = [{'check': 'row', 'engine': 'exhaustive', 'seconds': seconds, 'diff': diff_groups(oracle, groups)}]
+
+    # Grupurile exact în forma în care deduplicate_products le dă mai departe la unificare
+    pipeline_groups, seconds = timed(repeat, collapsed, find_similar_products, df, df.columns[:6])
+    results.append({'check': 'row', 'engine': 'exact_collapse', 'seconds': seconds,
+                    'diff': diff_groups(oracle, pipeline_groups)})
+
+    groups, seconds = timed(repeat, find_similar_products_windowed, df, window=WINDOW)
+    diff = diff_groups(oracle, groups)
+    # Grupurile lipsă sau în plus sunt acceptate cât timp recall-ul rămâne peste prag
+    diff['recall'] = same_pairs_recall(oracle, groups)
+    diff['min_recall'] = MIN_WINDOW_RECALL
+    results.append({'check': 'row', 'engine': 'windowed', 'seconds': seconds, 'diff': diff})
+
+    expected_rows = []
+    for group in oracle:
+        merged_row = df.iloc[group[0]]
+        for idx in group[1:]:
+            merged_row = procesing_merge_product_info(merged_row, df.iloc[idx])
+        expected_rows.append(merged_row)
+
+    def merge_groups():
+        grouped_rows = [idx for group in pipeline_groups for idx in group]
+        text_columns = [col for col in df.columns if pd.api.types.is_string_dtype(df[col].dtype)]
+        token_matrices = build_token_matrices(df, text_columns, grouped_rows)
+        column_values = {col: df[col].tolist() for col in df.columns}
+        return [merge_product_group(column_values, group, token_matrices) for group in pipeline_groups]
+
+    merged_rows, seconds = timed(repeat, merge_groups)
+    mismatches = diff_rows(pd.DataFrame(expected_rows), pd.DataFrame(merged_rows), cell=token_cell)
+    results.append({'check': 'row', 'engine': 'merge_tokens', 'seconds': seconds, 'diff': {'rows': mismatches}})
+
+    # Pipeline-ul complet, cu citirea și scrierea fișierelor, față de cel din baseline
+    with tempfile.TemporaryDirectory() as folder:
+        input_file = os.path.join(folder, 'fixture.xlsx')
+        df.to_excel(input_file, index=False)
+        expected = procesing_deduplicate(pd.read_excel(input_file))
+        deduplicated, seconds = timed(repeat, deduplicate_products, input_file,
+                                      os.path.join(folder, 'deduplicated.xlsx'))
+    results.append({'check': 'row', 'engine': 'deduplicate_products', 'seconds': seconds,
+                    'diff': {'rows': diff_rows(expected, deduplicated, cell=token_cell)}})
+    return results
+
+
+def check_url_engines(df, n_workers=2, repeat=3):
+    """Process_Parquet: motoarele paralele față de find_similar_products și merge_product_info din baseline"""
+    from Process_Parquet import find_similar_products, merge_similarity_groups
+    from Distributed import LocalBackend, find_similar_products_distributed
+    from Scheduler import find_similar_products_scheduled
+    from Legacy_Oracles import parquet_find_similar_products, parquet_merge_product_info
+
+    oracle = parquet_find_similar_products(df)
+    groups, seconds = timed(repeat, find_similar_products, df)
+    results = [{'check': 'url', 'engine': 'exhaustive', 'seconds': seconds, 'diff': diff_groups(oracle, groups)}]
+
+    groups, seconds = timed(repeat, find_similar_products_distributed, df, LocalBackend(n_workers))
+    results.append({'check': 'url', 'engine': 'distributed', 'seconds': seconds, 'diff': diff_groups(oracle, groups)})
+
+    # Fără limită de bloc, ca rezultatul să poată fi comparat exact cu oracolul
+    groups, seconds = timed(repeat, find_similar_products_scheduled, df, n_workers, None)
+    results.append({'check': 'url', 'engine': 'scheduled', 'seconds': seconds, 'diff': diff_groups(oracle, groups)})
+
+    expected = pd.DataFrame([parquet_merge_product_info(df.iloc[group]) for group in oracle.values()],
+                            columns=df.columns)
+    merged, seconds = timed(repeat, merge_similarity_groups, df, oracle)
+    results.append({'check': 'url', 'engine': 'merge_vectorized', 'seconds': seconds,
+                    'diff': {'rows': diff_rows(expected, merged)}})
+    return results
+
+
+def export_fixture(n_rows=EXPORT_ROWS, seed=FIXTURE_SEED):
+    """Tabel de exportat cu câte un page_url unic pe rând și valori lipsă"""
+    rng = random.Random(seed)
+    return pd.DataFrame({
+        'root_domain': [f"shop{n % 97}.example.com" for n in range(n_rows)],
+        'page_url': [f"https://shop{n % 97}.example.com/product/{n}" for n in range(n_rows)],
+        'product_title': [' '.join(rng.sample(WORDS, 3)) if n % 50 else None for n in range(n_rows)],
+        'stock': [rng.randrange(1000) for _ in range(n_rows)],
+    })
+
+
+def check_export_engines(n_rows=EXPORT_ROWS, n_workers=2, repeat=3):
+    """Convert: exportul pe bucăți, citit înapoi și comparat cu tabelul parquet"""
+    from Convert import export_parquet_shards
+
+    source = export_fixture(n_rows)
+    expected = source.astype(str).mask(source.isna(), '')
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        input_file = os.path.join(folder, 'export.parquet')
+        source.to_parquet(input_file, row_group_size=10_000, index=False)
+        for file_format, read in (('xlsx', pd.read_excel), ('csv', pd.read_csv)):
+            with contextlib.redirect_stdout(io.StringIO()):
+                report, seconds = timed(repeat, export_parquet_shards, input_file,
+                                        os.path.join(folder, file_format), file_format, workers=n_workers)
+            exported = pd.concat([read(shard['file']) for shard in report], ignore_index=True)
+            reported_rows = sum(shard['rows'] for shard in report)
+            if len(exported) != n_rows or reported_rows != n_rows:
+                mismatches = [('rows', n_rows, len(exported), reported_rows)]
+            else:
+                actual = exported.astype(str).mask(exported.isna(), '')
+                mismatches = [(int(position), 'row') for position in
+                              np.flatnonzero((actual.to_numpy() != expected.to_numpy()).any(axis=1))]
+            results.append({'check': 'export', 'engine': file_format, 'seconds': seconds, 'rows': n_rows,
+                            'diff': {'rows': mismatches}})
+    return results
+
+
+def evaluate(results, rows, budgets=BUDGETS, baseline=None, tolerance=DEFAULT_TOLERANCE):
+    """Marchează fiecare rezultat: ieșire identică cu oracolul și timp în buget"""
+    for result in results:
+        key = f"{result['check']}/{result['engine']}"
+        diff = result['diff']
+        result_rows = result.get('rows', rows)
+        result['rows_per_second'] = result_rows / result['seconds'] if result['seconds'] else float('inf')
+        result['budget'] = budgets.get(key)
+        problems = []
+        if 'recall' in diff:
+            if diff['recall'] < diff['min_recall']:
+                problems.append(f"recall {diff['recall']:.3f} < {diff['min_recall']}")
+        elif diff.get('missing') or diff.get('extra'):
+            problems.append(f"grupuri lipsă: {len(diff['missing'])}, în plus: {len(diff['extra'])}")
+        if diff.get('rows'):
+            problems.append(f"rânduri diferite: {len(diff['rows'])}")
+        if result['budget'] is not None and result['seconds'] > result['budget']:
+            problems.append(f"timp peste buget ({result['budget']:.2f}s)")
+        if baseline and key in baseline:
+            floor = baseline[key] * (1 - tolerance)
+            if result['rows_per_second'] < floor:
+                problems.append(f"throughput sub baseline ({result['rows_per_second']:.0f} < {floor:.0f} rânduri/s)")
+        result['problems'] = problems
+        result['ok'] = not problems
+    return results
+
+
+def run_harness(n_products=FIXTURE_PRODUCTS, seed=FIXTURE_SEED, n_workers=2, checks=('text', 'row', 'url', 'export'),
+                baseline=None, tolerance=DEFAULT_TOLERANCE, repeat=3):
+    """Rulează oracolele și motoarele pe fixture și întoarce rândurile raportului"""
+    df = generate_fixture(n_products, seed)
+    logger.info(f"Fixture generat: {len(df)} rânduri din {n_products} produse (seed {seed})")
+    results = []
+    if 'text' in checks:
+        results.extend(check_text_engines(df, repeat))
+    if 'row' in checks:
+        results.extend(check_row_engines(df, repeat))
+    if 'url' in checks:
+        results.extend(check_url_engines(df, n_workers, repeat))
+    if 'export' in checks:
+        results.extend(check_export_engines(n_workers=n_workers, repeat=repeat))
+    return evaluate(results, len(df), baseline=baseline, tolerance=tolerance)
+
+
+def print_report(results):
+    print(f"{'Verificare':<12}{'Motor':<22}{'Timp (s)':>10}{'Rânduri/s':>12}{'Buget (s)':>11}  Status")
+    for result in results:
+        budget = f"{result['budget']:.2f}" if result['budget'] is not None else '-'
+        status = 'OK' if result['ok'] else 'EȘUAT: ' + '; '.join(result['problems'])
+        print(f"{result['check']:<12}{result['engine']:<22}{result['seconds']:>10.3f}"
+              f"{result['rows_per_second']:>12.0f}{budget:>11}  {status}")
+        if result['ok']:
+            continue
+        for group in result['diff'].get('missing', [])[:5]:
+            print(f"    lipsă: {group}")
+        for group in result['diff'].get('extra', [])[:5]:
+            print(f"    în plus: {group}")
+        for mismatch in result['diff'].get('rows', [])[:5]:
+            print(f"    rând diferit: {mismatch}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compară motoarele rapide cu implementările exhaustive pe date generate")
+    parser.add_argument('--products', type=int, default=FIXTURE_PRODUCTS, help="produse de bază în fixture")
+    parser.add_argument('--seed', type=int, default=FIXTURE_SEED)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--checks', nargs='+', choices=['text', 'row', 'url', 'export'],
+                        default=['text', 'row', 'url', 'export'])
+    parser.add_argument('--baseline', default=None, help="JSON cu throughput-ul de referință (rânduri/s)")
+    parser.add_argument('--save-baseline', default=None, help="salvează throughput-ul acestei rulări ca referință")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="scăderea de throughput acceptată față de baseline (0.5 = 50%%)")
+    parser.add_argument('--repeat', type=int, default=3, help="de câte ori se repetă fiecare măsurătoare")
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    # Logurile pipeline-urilor (inclusiv DEBUG din Procesing) acoperă raportul
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results = run_harness(args.products, args.seed, args.workers, args.checks, baseline, args.tolerance,
+                          args.repeat)
+    print_report(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({f"{r['check']}/{r['engine']}": r['rows_per_second'] for r in results}, f, indent=2)
+
+    sys.exit(0 if all(result['ok'] for result in results) else 1)
@@ -0,0 +1,173 @@
+import argparse
+import logging
+import time
+from collections import defaultdict
+from Lazy_Imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Cheile secundare folosite, în ordine, pentru a sparge blocurile prea mari
+SUB_BLOCK_LEVELS = [('path', 1), ('path', 2), ('title', 1), ('title', 2)]
+
+# Blocurile mici sunt trimise împreună, ca să nu plătim overhead-ul per sarcină
+MIN_TASK_ROWS = 2000
+
+
+def url_path_prefix(url, depth):
+    """Primele `depth` segmente din calea URL-ului, după domeniu"""
+    from Process_Parquet import preprocess_url
+
+    segments = preprocess_url(url).split('/')[1:]
+    return '/'.join(segments[:depth])
+
+
+def title_prefix(title, depth):
+    """Primele `depth` cuvinte din titlu, normalizate"""
+    if pd.isna(title):
+        return ""
+    return ' '.join(str(title).lower().split()[:depth])
+
+
+def sub_block_key(level, url, title):
+    kind, depth = SUB_BLOCK_LEVELS[level]
+    if kind == 'path':
+        return f"path:{url_path_prefix(url, depth)}"
+    return f"title:{title_prefix(title, depth)}"
+
+
+def split_block(key, positions, urls, titles, max_block_size, level=0):
+    """Sparge recursiv un bloc prea mare după cheile secundare"""
+    if len(positions) <= max_block_size:
+        return [(key, positions)]
+
+    while level < len(SUB_BLOCK_LEVELS):
+        if SUB_BLOCK_LEVELS[level][0] == 'title' and titles is None:
+            level += 1
+            continue
+        sub_blocks = defaultdict(list)
+        for position in positions:
+            title = titles[position] if titles is not None else None
+            sub_blocks[sub_block_key(level, urls[position], title)].append(position)
+        if len(sub_blocks) > 1:
+            blocks = []
+            for sub_key, sub_positions in sub_blocks.items():
+                blocks.extend(split_block(key + (sub_key,), sub_positions, urls, titles, max_block_size, level + 1))
+            return blocks
+        # Cheia nu a separat nimic, încercăm nivelul următor
+        level += 1
+
+    logger.warning(f"Blocul {key} are încă {len(positions)} rânduri după toate cheile secundare")
+    return [(key, positions)]
+
+
+def build_blocks(df, key='root_domain', max_block_size=5000, url_column='page_url', title_column='product_title'):
+    """Blocurile după root_domain, cu blocurile uriașe sparte în sub-blocuri.
+
+    Rândurile fără root_domain formează un bloc propriu (cheia None), ca în
+    Process_Parquet.find_similar_products. Rândurile din sub-blocuri diferite nu mai
+    sunt comparate, deci max_block_size controlează compromisul dintre timpul
+    blocului cel mai lent și recall.
+    """
+    urls = df[url_column].to_numpy(dtype=object)
+    titles = df[title_column].to_numpy(dtype=object) if title_column in df.columns else None
+
+    # Codurile din factorize păstrează valorile lipsă (-1), pe care groupby le-ar elimina
+    codes, uniques = pd.factorize(df[key])
+    blocks = []
+    for code, positions in pd.Series(np.arange(len(df))).groupby(codes, sort=False).indices.items():
+        if len(positions) < 2:
+            continue
+        block_key = uniques[code] if code >= 0 else None
+        positions = positions.tolist()
+        if max_block_size and len(positions) > max_block_size:
+            blocks.extend(split_block((block_key,), positions, urls, titles, max_block_size))
+        else:
+            blocks.append(((block_key,), positions))
+    return [(block_key, positions) for block_key, positions in blocks if len(positions) > 1]
+
+
+def plan_tasks(blocks, urls, threshold=0.85, min_task_rows=MIN_TASK_ROWS):
+    """Ordonează blocurile descrescător după cost (n^2) și grupează blocurile mici.
+
+    Sarcinile au formatul din Distributed.process_partition, deci pot rula pe
+    LocalBackend sau pe ClusterBackend.
+    """
+    blocks = sorted(blocks, key=lambda block: len(block[1]), reverse=True)
+    task_blocks = []
+    pending, pending_rows = [], 0
+    for block_key, positions in blocks:
+        entry = (block_key, positions, [urls[p] for p in positions])
+        if len(positions) >= min_task_rows:
+            task_blocks.append([entry])
+            continue
+        pending.append(entry)
+        pending_rows += len(positions)
+        if pending_rows >= min_task_rows:
+            task_blocks.append(pending)
+            pending, pending_rows = [], 0
+    if pending:
+        task_blocks.append(pending)
+    return [{'partition_id': n, 'blocks': entries, 'threshold': threshold} for n, entries in enumerate(task_blocks)]
+
+
+def log_block_timings(block_stats, top=5):
+    """Raportul de latență pe blocuri: totalul, coada (p95, max) și cele mai lente blocuri"""
+    if not block_stats:
+        return
+    seconds = np.array([stats['seconds'] for stats in block_stats])
+    logger.info(f"Blocuri procesate: {len(block_stats)}, timp total {seconds.sum():.2f}s, "
+                f"p50 {np.percentile(seconds, 50):.3f}s, p95 {np.percentile(seconds, 95):.3f}s, "
+                f"max {seconds.max():.2f}s")
+    for stats in sorted(block_stats, key=lambda s: s['seconds'], reverse=True)[:top]:
+        logger.info(f"Bloc lent {stats['block']}: {stats['rows']} rânduri, {stats['seconds']:.2f}s "
+                    f"(worker {stats['worker_pid']})")
+
+
+def find_similar_products_scheduled(df, n_workers=None, max_block_size=5000, threshold=0.85, backend=None):
+    """Varianta paralelă a Process_Parquet.find_similar_products, rezistentă la domenii uriașe.
+
+    Blocurile sunt trimise către workeri de la cel mai mare la cel mai mic, ca
+    blocul cel mai lent să pornească primul și să nu rămână la coadă. backend
+    este unul din Distributed (implicit LocalBackend cu n_workers procese).
+    """
+    from Distributed import LocalBackend, resolve_clusters, run_tasks
+
+    logger.info("Începe identificarea produselor similare pe blocuri...")
+    try:
+        start_time = time.time()
+        backend = backend or LocalBackend(n_workers)
+        blocks = build_blocks(df, max_block_size=max_block_size)
+        tasks = plan_tasks(blocks, df['page_url'].to_numpy(dtype=object), threshold)
+        logger.info(f"Blocuri: {len(blocks)}, sarcini: {len(tasks)}, cel mai mare bloc: "
+                    f"{max((len(p) for _, p in blocks), default=0)} rânduri")
+
+        edges, partition_stats = run_tasks(backend, tasks)
+        log_block_timings([block for stats in partition_stats for block in stats['block_stats']])
+        logger.info(f"Timp total pe blocuri (wall): {time.time() - start_time:.2f}s")
+        return resolve_clusters(edges, len(df))
+    except Exception as e:
+        logger.error(f"Eroare la procesarea pe blocuri: {str(e)}")
+        raise
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicare pe blocuri root_domain, cu blocurile mari sparte")
+    parser.add_argument('--input', default='veridion_product_deduplication_challenge.snappy.parquet')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-block-size', type=int, default=5000,
+                        help="peste această dimensiune blocul este spart după cheile secundare")
+    args = parser.parse_args()
+
+    from Process_Parquet import process_parquet_file
+
+    process_parquet_file(
+        args.input,
+        find_groups=lambda df: find_similar_products_scheduled(df, args.workers, args.max_block_size)
+    )
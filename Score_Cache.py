@@ -0,0 +1,141 @@
+import sqlite3
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+UINT64_OFFSET = 1 << 64
+INT64_MAX = (1 << 63) - 1
+
+
+def to_signed(value):
+    """SQLite stochează doar întregi cu semn pe 64 de biți"""
+    value = int(value)
+    return value - UINT64_OFFSET if value > INT64_MAX else value
+
+
+class ScoreCache:
+    """Cache pentru scorurile perechilor de rânduri, refolosit între rulări.
+
+    Cheia este (hash rând, hash rând, comparator). Nivelul din memorie este un LRU
+    limitat la `capacity` intrări; intrările evacuate și cele noi ajung la închidere
+    într-o bază SQLite pe disc, dacă a fost dat un `path`.
+    """
+
+    def __init__(self, path=None, capacity=1_000_000, flush_every=50_000):
+        self.path = path
+        self.capacity = capacity
+        self.flush_every = flush_every
+        # cheie -> (scor, deja salvat pe disc)
+        self.memory = OrderedDict()
+        self.pending = {}
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+        self.connection = None
+        if path is not None:
+            self.connection = sqlite3.connect(path)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "hash1 INTEGER NOT NULL, hash2 INTEGER NOT NULL, comparator TEXT NOT NULL, "
+                "score REAL NOT NULL, PRIMARY KEY (hash1, hash2, comparator)) WITHOUT ROWID"
+            )
+            logger.info(f"Cache de scoruri deschis: {path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def make_key(hash1, hash2, comparator, symmetric=True):
+        """Construiește cheia; pentru comparatori simetrici ordinea perechii nu contează"""
+        hash1, hash2 = to_signed(hash1), to_signed(hash2)
+        if symmetric and hash1 > hash2:
+            hash1, hash2 = hash2, hash1
+        return (hash1, hash2, comparator)
+
+    def get(self, key):
+        """Întoarce scorul din cache sau None"""
+        entry = self.memory.get(key)
+        if entry is not None:
+            self.memory.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return entry[0]
+
+        score = self.pending.get(key)
+        if score is None and self.connection is not None:
+            row = self.connection.execute(
+                "SELECT score FROM scores WHERE hash1 = ? AND hash2 = ? AND comparator = ?", key
+            ).fetchone()
+            if row is not None:
+                score = row[0]
+        if score is not None:
+            self.stats['disk_hits'] += 1
+            self._remember(key, score, persisted=key not in self.pending)
+            return score
+
+        self.stats['misses'] += 1
+        return None
+
+    def put(self, key, score):
+        self._remember(key, float(score), persisted=False)
+
+    def get_or_compute(self, hash1, hash2, comparator, compute, symmetric=True):
+        """Scorul perechii din cache; dacă lipsește, îl calculează cu `compute()` și îl păstrează"""
+        key = self.make_key(hash1, hash2, comparator, symmetric)
+        score = self.get(key)
+        if score is None:
+            score = compute()
+            self.put(key, score)
+        return score
+
+    def _remember(self, key, score, persisted):
+        self.memory[key] = (score, persisted)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.capacity:
+            old_key, (old_score, old_persisted) = self.memory.popitem(last=False)
+            self.stats['evictions'] += 1
+            if not old_persisted and self.connection is not None:
+                self.pending[old_key] = old_score
+        if len(self.pending) >= self.flush_every:
+            self._write_pending()
+
+    def _write_pending(self):
+        if self.connection is None or not self.pending:
+            return
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO scores (hash1, hash2, comparator, score) VALUES (?, ?, ?, ?)",
+            [(*key, score) for key, score in self.pending.items()]
+        )
+        self.connection.commit()
+        self.pending.clear()
+
+    def flush(self):
+        """Scrie pe disc toate scorurile noi, inclusiv cele aflate încă în memorie"""
+        if self.connection is None:
+            return
+        for key, (score, persisted) in self.memory.items():
+            if not persisted:
+                self.pending[key] = score
+                self.memory[key] = (score, True)
+        self._write_pending()
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+    def report(self):
+        """Statisticile cache-ului pentru raportul final al rulării"""
+        lookups = self.stats['memory_hits'] + self.stats['disk_hits'] + self.stats['misses']
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        return {
+            **self.stats,
+            'lookups': lookups,
+            'hit_rate': hits / lookups if lookups else 0.0,
+            'memory_entries': len(self.memory),
+        }
@@ -0,0 +1,121 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Modulele grele care nu trebuie încărcate pe căile de pornire rapidă
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'fuzzywuzzy', 'Levenshtein', 'tqdm']
+
+ENTRY_POINTS = [
+    'analyze', 'Procesing', 'Data_Procesing', 'Process_Parquet',
+    'Distributed', 'Scheduler', 'Dedup_Server', 'Threshold_Sweep', 'Convert', 'Convert2',
+    'Regression_Harness',
+]
+
+# Bugetul de pornire la rece, în secunde
+BUDGETS = {
+    'help': 0.3,
+    'worker_spawn': 0.3,
+    'small_file': 5.0,
+}
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def run_timed(command, cwd=REPO_DIR, repeat=3):
+    """Cel mai bun timp de rulare (secunde) al comenzii, dintr-un proces nou"""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    best = None
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        subprocess.run(command, cwd=cwd, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - start_time
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def loaded_heavy_modules(module):
+    """Modulele grele încărcate de importul modulului, după raportul -X importtime"""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True)
+    loaded = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        name = line.rsplit('|', 1)[1].strip().split('.')[0]
+        if name in HEAVY_MODULES:
+            loaded.add(name)
+    return sorted(loaded)
+
+
+def write_small_fixture(directory):
+    """Un fișier Excel mic, pentru calea de rulare pe fișiere mici"""
+    import pandas as pd
+
+    path = os.path.join(directory, 'small.xlsx')
+    rows = []
+    for n in range(20):
+        title = f"product {n // 2} model {n % 5}"
+        rows.append({
+            'root_domain': f"shop{n % 3}.com",
+            'page_url': f"https://shop{n % 3}.com/p/{n // 2}",
+            'product_title': title,
+            'product_name': title,
+            'product_summary': f"summary {n}",
+            'brand': f"brand {n % 4}",
+        })
+    pd.DataFrame(rows).to_excel(path, index=False)
+    return path
+
+
+def startup_report(budgets=BUDGETS, repeat=3):
+    """Măsoară căile de pornire și întoarce rândurile raportului"""
+    report = []
+    for module in ENTRY_POINTS:
+        report.append({
+            'path': 'help', 'target': module,
+            'seconds': run_timed([sys.executable, f'{module}.py', '--help'], repeat=repeat),
+            'heavy': [],
+        })
+        report.append({
+            'path': 'worker_spawn', 'target': module,
+            'seconds': run_timed([sys.executable, '-c', f'import {module}'], repeat=repeat),
+            'heavy': loaded_heavy_modules(module),
+        })
+
+    with tempfile.TemporaryDirectory() as directory:
+        fixture = write_small_fixture(directory)
+        command = [sys.executable, '-c',
+                   f"import Procesing; Procesing.deduplicate_products({fixture!r}, 'out.xlsx')"]
+        report.append({
+            'path': 'small_file', 'target': 'Procesing',
+            'seconds': run_timed(command, cwd=directory, repeat=1),
+            'heavy': [],
+        })
+
+    for row in report:
+        row['budget'] = budgets[row['path']]
+        row['ok'] = row['seconds'] <= row['budget'] and not row['heavy']
+    return report
+
+
+def print_report(report):
+    print(f"{'Cale':<14}{'Modul':<18}{'Timp (s)':>10}{'Buget (s)':>11}  Status")
+    for row in report:
+        status = 'OK' if row['ok'] else 'DEPĂȘIT'
+        if row['heavy']:
+            status += f" (încarcă: {', '.join(row['heavy'])})"
+        print(f"{row['path']:<14}{row['target']:<18}{row['seconds']:>10.3f}{row['budget']:>11.2f}  {status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raport al timpului de pornire la rece pentru scripturi")
+    parser.add_argument('--repeat', type=int, default=3, help="de câte ori se repetă fiecare măsurătoare")
+    args = parser.parse_args()
+    report = startup_report(repeat=args.repeat)
+    print_report(report)
+    sys.exit(0 if all(row['ok'] for row in report) else 1)
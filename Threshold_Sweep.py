@@ -0,0 +1,265 @@
+import logging
+import os
+import json
+import argparse
+from Lazy_Imports import lazy_import, tqdm
+from Procesing import build_sort_order, resolve_sort_keys
+from Exact_Duplicates import compute_row_hashes
+from Clusters import connected_labels
+from Score_Cache import ScoreCache
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Regula 'mean' este media câmpurilor (ca în Procesing și analyze), 'min' cere ca toate
+# câmpurile să depășească pragul (ca în Data_Procesing), iar un tuplu de ponderi dă media ponderată
+DEFAULT_THRESHOLDS = [0.70, 0.75, 0.80, 0.85, 0.90, 0.95]
+DEFAULT_RULES = ['mean', 'min']
+
+# Fereastra implicită pentru perechile candidate; toate perechile nu încap în memorie pe fișierul întreg
+DEFAULT_WINDOW = 10
+
+PIPELINES = ['procesing', 'data_procesing', 'analyze']
+
+
+def pipeline_scorer(pipeline):
+    """Comparatorul, coloanele și regula folosite exact ca în pipeline-ul dat.
+
+    as_text marchează pipeline-urile care compară valorile după astype(str), strip spune
+    dacă spațiile de la capete contează pentru comparator (cheia din cache), iar symmetric
+    dacă scorul e același la inversarea argumentelor (fuzz.partial_ratio nu este).
+    """
+    if pipeline == 'procesing':
+        from Procesing import calculate_similarity
+        return {'comparator': calculate_similarity, 'columns': lambda df: df.columns[:6].tolist(),
+                'as_text': True, 'strip': True, 'symmetric': True, 'rule': 'mean'}
+    if pipeline == 'data_procesing':
+        from Data_Procesing import calculate_similarity
+        return {'comparator': calculate_similarity, 'columns': lambda df: ['product_title', 'product_name'],
+                'as_text': False, 'strip': True, 'symmetric': False, 'rule': 'min'}
+    if pipeline == 'analyze':
+        from analyze import similar
+        return {'comparator': similar, 'columns': lambda df: df.columns[:6].tolist(),
+                'as_text': False, 'strip': False, 'symmetric': False, 'rule': 'mean'}
+    raise ValueError(f"Pipeline necunoscut: {pipeline} (disponibile: {', '.join(PIPELINES)})")
+
+
+def all_pairs(total_rows):
+    """Toate perechile (i, j) cu i < j"""
+    first, second = np.triu_indices(total_rows, k=1)
+    return np.stack([first, second], axis=1).astype(np.int64)
+
+
+def windowed_pairs(df, window=10, sort_keys=None):
+    """Perechile candidate din modul sorted-neighbourhood, fără a le calcula scorul"""
+    candidates = set()
+    for sort_key in resolve_sort_keys(df, sort_keys):
+        order = build_sort_order(df, sort_key)
+        for offset in range(1, window + 1):
+            first, second = order[:-offset], order[offset:]
+            candidates.update(zip(np.minimum(first, second).tolist(), np.maximum(first, second).tolist()))
+    return np.array(sorted(candidates), dtype=np.int64).reshape(-1, 2)
+
+
+def score_candidate_pairs(df, pairs=None, pipeline='procesing', cache=None):
+    """Calculează o singură dată scorul fiecărui câmp pentru perechile candidate.
+
+    Câmpurile și comparatorul sunt cele ale pipeline-ului ales (vezi pipeline_scorer).
+    Întoarce perechile (m x 2), matricea scorurilor (m x număr de coloane) și coloanele.
+    """
+    try:
+        scorer = pipeline_scorer(pipeline)
+        comparator = scorer['comparator']
+        columns = scorer['columns'](df)
+        if pairs is None:
+            pairs = all_pairs(len(df))
+        frame = df[columns].astype(str) if scorer['as_text'] else df[columns]
+        values = [frame[col].to_numpy() for col in columns]
+        if cache is not None:
+            hashes = [compute_row_hashes(frame, [col], strip=scorer['strip']) for col in columns]
+
+        scores = np.empty((len(pairs), len(columns)), dtype=np.float32)
+        for n, (i, j) in enumerate(tqdm(pairs, desc="Scorare perechi")):
+            for k, col in enumerate(columns):
+                if cache is not None:
+                    scores[n, k] = cache.get_or_compute(
+                        hashes[k][i], hashes[k][j], f"{pipeline}:{col}",
+                        lambda: comparator(values[k][i], values[k][j]), symmetric=scorer['symmetric']
+                    )
+                else:
+                    scores[n, k] = comparator(values[k][i], values[k][j])
+
+        logger.info(f"Perechi scorate: {len(pairs)}, câmpuri: {list(columns)}, pipeline: {pipeline}")
+        return pairs, scores, columns
+    except Exception as e:
+        logger.error(f"Eroare la scorarea perechilor: {str(e)}")
+        raise
+
+
+def scores_source(input_file, pipeline, window, sort_keys):
+    """Tot ce determină scorurile salvate: fișierul de intrare (cu mtime și mărime),
+    pipeline-ul și perechile candidate. Scorurile se refolosesc doar dacă totul coincide.
+    """
+    stat = os.stat(input_file)
+    return {
+        'input': os.path.abspath(input_file),
+        'mtime': stat.st_mtime,
+        'size': stat.st_size,
+        'pipeline': pipeline,
+        'window': window,
+        'sort_keys': [list(key) for key in sort_keys] if sort_keys else None,
+    }
+
+
+def save_scores(path, pairs, scores, columns, total_rows, source):
+    """Salvează perechile și scorurile brute ca să poată fi refolosite"""
+    np.savez_compressed(path, pairs=pairs, scores=scores, columns=np.array(list(columns)),
+                        total_rows=total_rows, source=json.dumps(source))
+    logger.info(f"Scoruri salvate în: {path}")
+
+
+def load_scores(path):
+    data = np.load(path)
+    source = json.loads(str(data['source'])) if 'source' in data.files else None
+    return data['pairs'], data['scores'], data['columns'].tolist(), int(data['total_rows']), source
+
+
+def combine_scores(scores, rule):
+    """Scorul perechii după regula dată: 'mean', 'min' sau un tuplu de ponderi"""
+    if rule == 'mean':
+        return scores.mean(axis=1)
+    if rule == 'min':
+        return scores.min(axis=1)
+    weights = np.asarray(rule, dtype=np.float32)
+    return scores @ (weights / weights.sum())
+
+
+def pair_counts(labels):
+    """Numărul de perechi din interiorul aceluiași cluster"""
+    _, counts = np.unique(labels, return_counts=True, axis=0)
+    return int((counts * (counts - 1) // 2).sum())
+
+
+def pairwise_metrics(predicted, truth):
+    """Precision/recall/F1 la nivel de perechi pentru rândurile etichetate"""
+    true_positive = pair_counts(np.stack([predicted, truth], axis=1))
+    predicted_pairs = pair_counts(predicted)
+    true_pairs = pair_counts(truth)
+    precision = true_positive / predicted_pairs if predicted_pairs else 1.0
+    recall = true_positive / true_pairs if true_pairs else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def sweep(pairs, scores, total_rows, thresholds=DEFAULT_THRESHOLDS, rules=DEFAULT_RULES, truth=None):
+    """Evaluează toate combinațiile prag x regulă pe scorurile deja calculate.
+
+    `truth` este opțional: un array cu id-ul real de cluster pentru fiecare rând,
+    cu -1 pentru rândurile neetichetate. Clusterele sunt componentele conexe ale
+    perechilor peste prag, deci pot fi mai mari decât grupurile greedy din pipeline-uri.
+    """
+    if truth is not None:
+        truth = np.asarray(truth)
+        labelled = np.flatnonzero(truth >= 0)
+
+    results = []
+    for rule in rules:
+        combined = combine_scores(scores, rule)
+        for threshold in thresholds:
+            labels = connected_labels(pairs[combined > threshold], total_rows)
+            clusters = len(np.unique(labels))
+            row = {
+                'rule': rule if isinstance(rule, str) else tuple(rule),
+                'threshold': threshold,
+                'clusters': clusters,
+                'reduction_pct': (total_rows - clusters) / total_rows * 100 if total_rows else 0.0,
+            }
+            if truth is not None:
+                row['precision'], row['recall'], row['f1'] = pairwise_metrics(labels[labelled], truth[labelled])
+            results.append(row)
+    return pd.DataFrame(results)
+
+
+def load_truth(path, total_rows):
+    """Citește eșantionul etichetat (coloanele row și cluster_id)"""
+    labelled = pd.read_csv(path)
+    truth = np.full(total_rows, -1, dtype=np.int64)
+    truth[labelled['row'].to_numpy()] = labelled['cluster_id'].to_numpy()
+    return truth
+
+
+def default_weights(columns):
+    """Ponderile implicite: primele două câmpuri cântăresc dublu față de restul"""
+    return [tuple(1.0 if n < 2 else 0.5 for n in range(len(columns)))]
+
+
+def evaluate_thresholds(input_file='veridion_product_deduplication_challenge.xlsx',
+                        scores_file='pair_scores.npz', labels_file='labelled_sample.csv',
+                        pipeline='procesing', window=DEFAULT_WINDOW, sort_keys=None,
+                        thresholds=DEFAULT_THRESHOLDS, weights=None, cache_path=None):
+    """Scorează perechile o singură dată și afișează rezultatele pentru toate pragurile.
+
+    Perechile candidate vin din sorted-neighbourhood (window); window=0 compară toate
+    perechile, ceea ce are sens doar pentru fișiere mici. Fiecare tuplu din `weights`
+    este evaluat ca regulă suplimentară pe lângă 'mean' și 'min'. Cu `cache_path`,
+    scorurile pe câmpuri sunt păstrate între rulări în cache-ul SQLite.
+    """
+    source = scores_source(input_file, pipeline, window, sort_keys)
+    scores_data = load_scores(scores_file) if os.path.exists(scores_file) else None
+    if scores_data is not None and scores_data[4] == source:
+        logger.info(f"Se refolosesc scorurile din: {scores_file}")
+        pairs, scores, columns, total_rows, _ = scores_data
+    else:
+        if scores_data is not None:
+            logger.info(f"Scorurile din {scores_file} provin din altă rulare, se recalculează")
+        df = pd.read_excel(input_file)
+        total_rows = len(df)
+        pairs = windowed_pairs(df, window, sort_keys) if window else None
+        cache = ScoreCache(cache_path) if cache_path else None
+        try:
+            pairs, scores, columns = score_candidate_pairs(df, pairs, pipeline, cache)
+        finally:
+            if cache is not None:
+                logger.info(f"Cache scoruri: {cache.report()}")
+                cache.close()
+        save_scores(scores_file, pairs, scores, columns, total_rows, source)
+
+    weights = default_weights(columns) if weights is None else [tuple(w) for w in weights]
+    for weight in weights:
+        if len(weight) != len(columns):
+            raise ValueError(f"Ponderile {weight} nu corespund câmpurilor {list(columns)}")
+
+    truth = load_truth(labels_file, total_rows) if os.path.exists(labels_file) else None
+    logger.info(f"Regula folosită de {pipeline}: {pipeline_scorer(pipeline)['rule']}")
+    results = sweep(pairs, scores, total_rows, thresholds=thresholds, rules=DEFAULT_RULES + weights, truth=truth)
+    print(results.to_string(index=False))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluare praguri pe scoruri calculate o singură dată")
+    parser.add_argument('--input', default='veridion_product_deduplication_challenge.xlsx')
+    parser.add_argument('--scores', default='pair_scores.npz', help="fișierul cu scorurile brute")
+    parser.add_argument('--labels', default='labelled_sample.csv', help="eșantion etichetat (row, cluster_id)")
+    parser.add_argument('--pipeline', choices=PIPELINES, default='procesing',
+                        help="comparatorul și câmpurile pipeline-ului evaluat")
+    parser.add_argument('--window', type=int, default=DEFAULT_WINDOW,
+                        help="fereastra sorted-neighbourhood pentru perechile candidate (0 = toate perechile)")
+    parser.add_argument('--sort-keys', nargs='+', default=None,
+                        help="chei de sortare, coloane separate prin virgulă (ex. root_domain,product_title)")
+    parser.add_argument('--thresholds', nargs='+', type=float, default=DEFAULT_THRESHOLDS,
+                        help="pragurile evaluate (ex. 0.8 0.85 0.9)")
+    parser.add_argument('--weights', nargs='+', default=None,
+                        help="seturi de ponderi, câte una pe câmp separate prin virgulă (ex. 1,1,0.5,0.5,0.5,0.5)")
+    parser.add_argument('--cache', default=None, help="fișier SQLite pentru cache-ul de scoruri")
+    args = parser.parse_args()
+    sort_keys = [tuple(key.split(',')) for key in args.sort_keys] if args.sort_keys else None
+    weights = [tuple(float(w) for w in weight.split(',')) for weight in args.weights] if args.weights else None
+    evaluate_thresholds(args.input, args.scores, args.labels, args.pipeline, args.window, sort_keys,
+                        args.thresholds, weights, args.cache)
@@ -0,0 +1,101 @@
+import logging
+from Lazy_Imports import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+logger = logging.getLogger(__name__)
+
+
+class Vocabulary:
+    """Vocabular comun care asociază fiecărui token un id întreg (uint32)"""
+
+    def __init__(self):
+        self.token_to_id = {}
+        self.id_to_token = []
+
+    def __len__(self):
+        return len(self.id_to_token)
+
+    def add(self, token):
+        """Întoarce id-ul tokenului, adăugându-l în vocabular dacă e nou"""
+        token_id = self.token_to_id.get(token)
+        if token_id is None:
+            token_id = len(self.id_to_token)
+            self.token_to_id[token] = token_id
+            self.id_to_token.append(token)
+        return token_id
+
+    def encode(self, tokens):
+        """Transformă o listă de tokeni într-un array de id-uri"""
+        return np.fromiter((self.add(t) for t in tokens), dtype=np.uint32, count=len(tokens))
+
+    def decode(self, ids):
+        """Transformă un array de id-uri înapoi într-un text separat prin spații"""
+        return ' '.join(self.id_to_token[i] for i in ids)
+
+
+class TokenMatrix:
+    """Tokenii fiecărui rând stocați compact în format CSR (offsets + values).
+
+    Pentru rândul k, id-urile sortate se află în values[offsets[k]:offsets[k + 1]].
+    Rândurile goale sau nule au lungime 0. Cu `positions`, matricea conține doar
+    rândurile date, iar row() primește poziția lor din DataFrame.
+    """
+
+    def __init__(self, offsets, values, vocabulary, positions=None):
+        self.offsets = offsets
+        self.values = values
+        self.vocabulary = vocabulary
+        self.local_rows = None if positions is None else {p: k for k, p in enumerate(positions)}
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def row(self, i):
+        """Id-urile sortate (cu repetiții) ale rândului i"""
+        k = i if self.local_rows is None else self.local_rows[i]
+        return self.values[self.offsets[k]:self.offsets[k + 1]]
+
+
+def build_token_matrix(values, vocabulary=None, positions=None):
+    """Tokenizează o coloană de texte și o stochează ca TokenMatrix.
+
+    Tokenii sunt cei originali (split pe spații), așa cum îi folosește merge_product_info.
+    """
+    try:
+        if vocabulary is None:
+            vocabulary = Vocabulary()
+
+        lengths = np.zeros(len(values), dtype=np.int64)
+        chunks = []
+        for i, text in enumerate(values):
+            if pd.isna(text):
+                continue
+            ids = vocabulary.encode(str(text).split())
+            ids.sort()
+            lengths[i] = len(ids)
+            chunks.append(ids)
+
+        offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        values_array = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.uint32)
+        return TokenMatrix(offsets, values_array, vocabulary, positions)
+    except Exception as e:
+        logger.error(f"Eroare la tokenizarea textelor: {str(e)}")
+        raise
+
+
+def build_token_matrices(df, columns, positions=None):
+    """Construiește câte o TokenMatrix pentru fiecare coloană, cu un vocabular comun.
+
+    Cu `positions` se tokenizează doar rândurile respective (de ex. cele din grupuri).
+    """
+    vocabulary = Vocabulary()
+    if positions is not None:
+        positions = sorted(positions)
+        df = df.iloc[positions]
+    return {
+        col: build_token_matrix(df[col].tolist(), vocabulary, positions)
+        for col in columns
+    }
@@ -1,6 +1,10 @@
-import pandas as pd
-import numpy as np
+import argparse
 from difflib import SequenceMatcher
+from Lazy_Imports import lazy_import
+from Exact_Duplicates import collapse_exact_duplicates, compute_row_hashes, write_cluster_mapping
+from Score_Cache import ScoreCache
+
+pd = lazy_import('pandas')
 
 def similar(a, b):
     """Calculează similaritatea între două șiruri de caractere"""
@@ -21,7 +25,10 @@ def merge_rows(row1, row2):
             merged[col] = row1[col] if len(str(row1[col])) >= len(str(row2[col])) else row2[col]
     return pd.Series(merged)
 
-def deduplicate_products():
+# Numele comparatorului folosit ca parte din cheia cache-ului de scoruri
+CACHE_COMPARATOR = 'sequence_matcher_mean_6'
+
+def deduplicate_products(threshold=0.8, cache_path=None):
     print("Se citește fișierul Excel...")
     df = pd.read_excel('veridion_product_deduplication_challenge.xlsx')
     
@@ -29,59 +36,106 @@ def deduplicate_products():
     columns_to_compare = df.columns[:6]
     print(f"Coloanele analizate: {columns_to_compare.tolist()}")
     
-    # Inițializăm lista pentru produsele deduplicate
-    deduplicated_products = []
-    processed_indices = set()
+    # Duplicatele exacte sunt unificate direct, fără comparație fuzzy. Ca în similar(),
+    # spațiile contează, iar o valoare lipsă dă scor 0, deci acele rânduri rămân separate
+    unique_df, representatives, exact_groups = collapse_exact_duplicates(
+        df, columns_to_compare, strip=False, collapse_nulls=False
+    )
+    
+    def members_of(idx):
+        """Pozițiile din df ale reprezentantului și ale duplicatelor sale exacte"""
+        return exact_groups.get(representatives[idx], [int(representatives[idx])])
+    
+    def full_row(idx):
+        """Rândul reprezentant unit cu duplicatele sale exacte"""
+        members = exact_groups.get(representatives[idx], [])
+        merged = unique_df.iloc[idx]
+        for member in members[1:]:
+            merged = merge_rows(merged, df.iloc[member])
+        return merged
+    
+    # Cache-ul de scoruri permite rerularea cu alt threshold fără a recalcula perechile
+    cache = ScoreCache(cache_path) if cache_path else None
+    try:
+        if cache is not None:
+            # SequenceMatcher nu e garantat simetric, deci hash-urile păstrează spațiile și ordinea
+            row_hashes = compute_row_hashes(unique_df, columns_to_compare, strip=False)
     
-    # Parcurgem fiecare rând
-    for i in range(len(df)):
-        if i in processed_indices:
-            continue
+        # Inițializăm lista pentru produsele deduplicate
+        deduplicated_products = []
+        processed_indices = set()
+        groups = []
+    
+        # Parcurgem fiecare rând
+        for i in range(len(unique_df)):
+            if i in processed_indices:
+                continue
             
-        current_row = df.iloc[i]
-        similar_rows = []
+            current_row = unique_df.iloc[i]
+            similar_rows = []
         
-        # Căutăm rânduri similare
-        for j in range(i + 1, len(df)):
-            if j in processed_indices:
-                continue
+            # Căutăm rânduri similare
+            for j in range(i + 1, len(unique_df)):
+                if j in processed_indices:
+                    continue
                 
-            similarity_score = 0
-            for col in columns_to_compare:
-                similarity_score += similar(current_row[col], df.iloc[j][col])
+                def compute_similarity():
+                    similarity_score = 0
+                    for col in columns_to_compare:
+                        similarity_score += similar(current_row[col], unique_df.iloc[j][col])
+                
+                    # Calculăm media similarității
+                    return similarity_score / len(columns_to_compare)
             
-            # Calculăm media similarității
-            avg_similarity = similarity_score / len(columns_to_compare)
+                if cache is not None:
+                    avg_similarity = cache.get_or_compute(
+                        row_hashes[i], row_hashes[j], CACHE_COMPARATOR, compute_similarity, symmetric=False
+                    )
+                else:
+                    avg_similarity = compute_similarity()
             
-            # Dacă similaritatea este mai mare de 0.8 (80%), considerăm că sunt același produs
-            if avg_similarity > 0.8:
-                similar_rows.append(j)
+                # Dacă similaritatea este mai mare de threshold (implicit 80%), considerăm că sunt același produs
+                if avg_similarity > threshold:
+                    similar_rows.append(j)
         
-        # Dacă am găsit rânduri similare, le unificăm
-        if similar_rows:
-            merged_row = current_row
-            for idx in similar_rows:
-                merged_row = merge_rows(merged_row, df.iloc[idx])
-                processed_indices.add(idx)
+            # Dacă am găsit rânduri similare, le unificăm
+            if similar_rows:
+                merged_row = full_row(i)
+                for idx in similar_rows:
+                    merged_row = merge_rows(merged_row, full_row(idx))
+                    processed_indices.add(idx)
             
-            deduplicated_products.append(merged_row)
-            processed_indices.add(i)
-        else:
-            deduplicated_products.append(current_row)
-            processed_indices.add(i)
+                deduplicated_products.append(merged_row)
+                processed_indices.add(i)
+                groups.append([member for idx in [i] + similar_rows for member in members_of(idx)])
+            else:
+                deduplicated_products.append(full_row(i))
+                processed_indices.add(i)
+                if len(members_of(i)) > 1:
+                    groups.append(members_of(i))
     
-    # Creăm un nou DataFrame cu produsele deduplicate
-    result_df = pd.DataFrame(deduplicated_products)
+        # Creăm un nou DataFrame cu produsele deduplicate
+        result_df = pd.DataFrame(deduplicated_products)
     
     
-    output_file = 'veridion_product_deduplication_challenge_deduplicated.xlsx'
-    print(f"Se salvează rezultatele în: {output_file}")
-    result_df.to_excel(output_file, index=False)
+        output_file = 'veridion_product_deduplication_challenge_deduplicated.xlsx'
+        print(f"Se salvează rezultatele în: {output_file}")
+        result_df.to_excel(output_file, index=False)
+        print(f"Maparea rând -> cluster: {write_cluster_mapping(groups, len(df), output_file)}")
     
-    print(f"\nStatistici:")
-    print(f"Număr inițial de produse: {len(df)}")
-    print(f"Număr final de produse după deduplicare: {len(result_df)}")
-    print(f"Număr de produse duplicate găsite: {len(df) - len(result_df)}")
+        print(f"\nStatistici:")
+        print(f"Număr inițial de produse: {len(df)}")
+        print(f"Număr final de produse după deduplicare: {len(result_df)}")
+        print(f"Număr de produse duplicate găsite: {len(df) - len(result_df)}")
+        if cache is not None:
+            print(f"Cache scoruri: {cache.report()}")
+    finally:
+        if cache is not None:
+            cache.close()
 
 if __name__ == "__main__":
-    deduplicate_products() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Deduplicare produse cu SequenceMatcher pe coloanele A-F")
+    parser.add_argument('--threshold', type=float, default=0.8)
+    parser.add_argument('--cache', default=None, help="fișier SQLite pentru cache-ul de scoruri")
+    args = parser.parse_args()
+    deduplicate_products(threshold=args.threshold, cache_path=args.cache) 
\ No newline at end of file